@@ -0,0 +1,72 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIRS = ("images", "sounds", "music")
+
+
+def list_assets(root=ROOT):
+    found = []
+    for kind in ASSET_DIRS:
+        directory = os.path.join(root, kind)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(filename)
+            if ext and not name.startswith("."):
+                found.append((kind, name, os.path.join(directory, filename)))
+    return found
+
+
+def warm_file(name, path):
+    with open(path, "rb") as f:
+        while f.read(1 << 16):
+            pass
+
+
+class AssetLoader:
+    def __init__(self, loaders, extra=(), workers=4, root=ROOT):
+        self.jobs = []
+        for kind, name, path in list_assets(root):
+            loader = loaders.get(kind)
+            if loader is not None:
+                self.jobs.append((f"{kind}/{name}", loader, (name, path)))
+        for label, fn in extra:
+            self.jobs.append((label, fn, ()))
+        self.workers = workers
+        self.total = len(self.jobs)
+        self.done = 0
+        self.failed = []
+        self.lock = threading.Lock()
+        self.futures = None
+
+    def start(self):
+        if self.futures is not None:
+            return
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="assets")
+        self.futures = [executor.submit(self.run_job, *job) for job in self.jobs]
+        executor.shutdown(wait=False)
+
+    def run_job(self, label, fn, args):
+        try:
+            fn(*args)
+        except Exception as exc:
+            with self.lock:
+                self.failed.append((label, exc))
+        with self.lock:
+            self.done += 1
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def ready(self):
+        return self.futures is not None and self.done == self.total
+
+    def wait(self):
+        self.start()
+        for future in self.futures:
+            future.result()
+        return self.failed
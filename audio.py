@@ -0,0 +1,80 @@
+import time
+
+DEFAULT_RULE = (9, 0.05)
+DEFAULT_LENGTH = 0.3
+
+
+class AudioDispatcher:
+    def __init__(self, lookup, rules=None, max_voices=6):
+        self.lookup = lookup
+        self.rules = rules or {}
+        self.max_voices = max_voices
+        self.enabled = True
+        self.pending = {}
+        self.last_played = {}
+        self.lengths = {}
+        self.voices = []
+        self.posted = 0
+        self.played = 0
+        self.dropped = 0
+
+    def post(self, name):
+        if self.enabled:
+            self.pending[name] = self.pending.get(name, 0) + 1
+
+    def clear(self):
+        self.pending.clear()
+
+    def length(self, name, sound):
+        found = self.lengths.get(name)
+        if found is None:
+            get_length = getattr(sound, "get_length", None)
+            found = get_length() if get_length is not None else DEFAULT_LENGTH
+            self.lengths[name] = found
+        return found
+
+    def flush(self, now=None):
+        pending = self.pending
+        if not pending:
+            return
+        now = time.perf_counter() if now is None else now
+        voices = [end for end in self.voices if end > now]
+        rules = self.rules
+        for name in sorted(pending, key=lambda n: rules.get(n, DEFAULT_RULE)[0]):
+            count = pending[name]
+            self.posted += count
+            interval = rules.get(name, DEFAULT_RULE)[1]
+            if len(voices) >= self.max_voices or now - self.last_played.get(name, -interval) < interval:
+                self.dropped += count
+                continue
+            try:
+                sound = self.lookup(name)
+                sound.play()
+            except Exception:
+                self.dropped += count
+                continue
+            self.played += 1
+            self.dropped += count - 1
+            self.last_played[name] = now
+            voices.append(now + self.length(name, sound))
+        self.voices = voices
+        pending.clear()
+
+    def stats(self):
+        return {"posted": self.posted, "played": self.played, "dropped": self.dropped, "voices": len(self.voices)}
+
+
+class NullAudio:
+    enabled = False
+
+    def post(self, name):
+        pass
+
+    def clear(self):
+        pass
+
+    def flush(self, now=None):
+        pass
+
+    def stats(self):
+        return {"posted": 0, "played": 0, "dropped": 0, "voices": 0}
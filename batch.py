@@ -0,0 +1,299 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from nav_grid import FlowField, NavGrid
+from wall_mask import WallMask
+
+TUNABLE = (
+    "DETECT_RANGE",
+    "TURRET_COOLDOWN",
+    "TURRET_DAMAGE",
+    "TURRET_RANGE",
+    "BULLET_DAMAGE",
+    "ENEMY_TOUCH_DAMAGE",
+    "SPIKE_DAMAGE",
+    "HEART_HEAL",
+    "PLAYER_HP",
+    "BASE_SLIMES",
+    "CHARGER_FROM_STAGE",
+    "MAX_STAGE",
+)
+FIRE_RANGE = 320
+FIRE_EVERY = 6
+STUCK_TICKS = 90
+BOT_STEP = 8
+REACH_EVERY = 30
+KEEP_AWAY = 80
+
+runner = None
+defaults = {}
+
+
+class Bot:
+    def __init__(self, game):
+        self.game = game
+        self.field = None
+        self.walls = None
+        self.reach = set()
+        self.reach_tick = None
+        self.last_shot = -FIRE_EVERY
+        self.best = None
+        self.stuck = 0
+        self.wiggle = 0
+
+    def prepare(self, pos, tick):
+        game = self.game
+        if game.walls is not self.walls:
+            self.walls = game.walls
+            actor = game.player.actor
+            body = [w.inflate(actor.width, actor.height) for w in game.walls]
+            grid = NavGrid(WallMask(body, game.WIDTH, game.HEIGHT), game.WIDTH, game.HEIGHT, BOT_STEP, actor.height / 2)
+            self.field = FlowField(grid)
+            self.reach_tick = None
+        if self.reach_tick is None or tick - self.reach_tick >= REACH_EVERY:
+            self.reach = set(self.field.grid.flood(self.field.grid.cell_of(pos)))
+            self.reach_tick = tick
+
+    def reachable(self, goal):
+        cx, cy = self.field.grid.cell_of(goal)
+        return any((x, y) in self.reach for x in range(cx - 1, cx + 2) for y in range(cy - 1, cy + 2))
+
+    def target(self, pos):
+        game = self.game
+        goals = [g.pos for g in game.gems] or [e.actor.pos for e in game.enemies] or [game.exit_rect.center]
+        open_goals = [g for g in goals if self.reachable(g)] or goals
+        return min(open_goals, key=lambda p: math.hypot(p[0] - pos[0], p[1] - pos[1]))
+
+    def aim(self, pos):
+        game = self.game
+        best = None
+        for enemy in game.enemies:
+            ex, ey = enemy.actor.pos
+            dist = math.hypot(ex - pos[0], ey - pos[1])
+            if dist <= FIRE_RANGE and (best is None or dist < best[0]):
+                if game.has_line_of_sight(pos, (ex, ey), game.walls):
+                    best = (dist, (ex, ey))
+        return best[1] if best else None
+
+    def steer(self, pos, goal):
+        field = self.field
+        field.update(goal)
+        direction = field.step_from(pos)
+        if direction is not None:
+            return direction
+        grid = field.grid
+        cx, cy = grid.cell_of(pos)
+        if (cx, cy) in field.distance:
+            waypoint = goal
+        else:
+            near = [
+                (field.distance[(x, y)], abs(x - cx) + abs(y - cy), (x, y))
+                for x in range(cx - 2, cx + 3)
+                for y in range(cy - 2, cy + 3)
+                if (x, y) in field.distance
+            ]
+            waypoint = grid.center_of(min(near)[2]) if near else goal
+        dx = waypoint[0] - pos[0]
+        dy = waypoint[1] - pos[1]
+        length = math.hypot(dx, dy) or 1
+        return (dx / length, dy / length)
+
+    def __call__(self, run):
+        game = self.game
+        keyboard = game.keyboard
+        keyboard.release_all()
+        pos = game.player.actor.pos
+        self.prepare(pos, run.ticks)
+        goal = self.target(pos)
+        dist = math.hypot(goal[0] - pos[0], goal[1] - pos[1])
+        if self.best is None or dist < self.best - 1:
+            self.best = dist
+            self.stuck = 0
+        else:
+            self.stuck += 1
+        if self.stuck > STUCK_TICKS:
+            self.wiggle = 30
+            self.stuck = 0
+            self.best = None
+        aim = self.aim(pos)
+        if self.wiggle:
+            self.wiggle -= 1
+            dx, dy = [(1, 1), (-1, 1), (1, -1), (-1, -1)][(run.ticks // 30) % 4]
+        elif aim is not None and math.hypot(aim[0] - pos[0], aim[1] - pos[1]) < KEEP_AWAY:
+            dx = pos[0] - aim[0]
+            dy = pos[1] - aim[1]
+        else:
+            dx, dy = self.steer(pos, goal)
+        if dx > 0.3:
+            keyboard.press("right")
+        elif dx < -0.3:
+            keyboard.press("left")
+        if dy > 0.3:
+            keyboard.press("down")
+        elif dy < -0.3:
+            keyboard.press("up")
+
+        player = game.player
+        if run.ticks - self.last_shot >= FIRE_EVERY:
+            if aim is not None:
+                game.on_mouse_down(aim)
+                self.last_shot = run.ticks
+            elif player.ammo < player.mag_size // 2:
+                game.on_key_down(game.keys.R)
+
+
+def init_worker():
+    global runner
+    from headless import HeadlessRunner
+
+    runner = HeadlessRunner()
+    for name in TUNABLE:
+        defaults[name] = getattr(runner.game, name)
+
+
+def simulate(job):
+    seed, overrides, max_seconds = job
+    game = runner.game
+    for name in TUNABLE:
+        setattr(game, name, overrides.get(name, defaults[name]))
+    runner.ticks = 0
+    runner.start(seed)
+    bot = Bot(game)
+    stage = game.stage
+    stage_start = 0
+    player = game.player
+    hp = player.hp
+    ammo = player.ammo
+    stages = {stage: {"damage": 0, "ammo": 0}}
+    limit = int(max_seconds * game.TICK_RATE)
+    while runner.ticks < limit and game.game_state == "playing":
+        bot(runner)
+        runner.step()
+        if game.player is not player:
+            player = game.player
+            ammo = player.ammo
+        if game.stage != stage:
+            stages[stage]["clear"] = (runner.ticks - stage_start) / game.TICK_RATE
+            stage = game.stage
+            stage_start = runner.ticks
+            stages[stage] = {"damage": 0, "ammo": 0}
+        current = stages[stage]
+        if player.hp < hp:
+            current["damage"] += hp - player.hp
+        hp = player.hp
+        if player.ammo < ammo:
+            current["ammo"] += ammo - player.ammo
+        ammo = player.ammo
+    if game.game_state == "win":
+        stages[stage]["clear"] = (runner.ticks - stage_start) / game.TICK_RATE
+        outcome = "win"
+    elif game.game_state == "game_over":
+        outcome = "dead"
+    else:
+        outcome = "timeout"
+    return {"seed": seed, "outcome": outcome, "stage": stage, "ticks": runner.ticks, "stages": stages}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def aggregate(results):
+    outcomes = {}
+    per_stage = {}
+    for result in results:
+        outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+        for stage, stats in result["stages"].items():
+            entry = per_stage.setdefault(stage, {"reached": 0, "deaths": 0, "timeouts": 0, "clear": [], "damage": [], "ammo": []})
+            entry["reached"] += 1
+            entry["damage"].append(stats["damage"])
+            entry["ammo"].append(stats["ammo"])
+            if "clear" in stats:
+                entry["clear"].append(stats["clear"])
+            elif result["outcome"] == "dead":
+                entry["deaths"] += 1
+            else:
+                entry["timeouts"] += 1
+    report = {"runs": len(results), "outcomes": outcomes, "stages": {}}
+    for stage in sorted(per_stage):
+        entry = per_stage[stage]
+        clear = entry["clear"]
+        report["stages"][stage] = {
+            "reached": entry["reached"],
+            "cleared": len(clear),
+            "deaths": entry["deaths"],
+            "timeouts": entry["timeouts"],
+            "clear_mean_s": sum(clear) / len(clear) if clear else None,
+            "clear_p50_s": percentile(clear, 0.5),
+            "clear_p90_s": percentile(clear, 0.9),
+            "damage_mean": sum(entry["damage"]) / entry["reached"],
+            "ammo_mean": sum(entry["ammo"]) / entry["reached"],
+        }
+    return report
+
+
+def run_batch(runs, first_seed=0, overrides=None, workers=None, max_seconds=180):
+    workers = workers or os.cpu_count() or 1
+    jobs = [(first_seed + i, overrides or {}, max_seconds) for i in range(runs)]
+    chunk = max(1, runs // (workers * 8))
+    start = time.perf_counter()
+    with Pool(workers, initializer=init_worker) as pool:
+        results = list(pool.imap_unordered(simulate, jobs, chunk))
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r["seed"])
+    report = aggregate(results)
+    report["workers"] = workers
+    report["overrides"] = overrides or {}
+    report["elapsed_s"] = elapsed
+    report["runs_per_s"] = runs / elapsed
+    report["ticks_per_s"] = sum(r["ticks"] for r in results) / elapsed
+    return report, results
+
+
+def parse_override(text):
+    name, _, value = text.partition("=")
+    if name not in TUNABLE:
+        raise argparse.ArgumentTypeError(f"{name} is not tunable; choose from {', '.join(TUNABLE)}")
+    return name, float(value) if "." in value else int(value)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Forest Relic batch simulation with a scripted bot")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0, help="first seed; run i uses seed + i")
+    parser.add_argument("--workers", type=int, default=None, help="default: every CPU core")
+    parser.add_argument("--max-seconds", type=float, default=180, help="game time before a run counts as a timeout")
+    parser.add_argument("--set", action="append", type=parse_override, default=[], metavar="NAME=VALUE")
+    parser.add_argument("--out", help="write the report (and every run with --runs-out) as JSON")
+    parser.add_argument("--runs-out", action="store_true")
+    args = parser.parse_args(argv)
+
+    report, results = run_batch(args.runs, args.seed, dict(args.set), args.workers, args.max_seconds)
+    print(
+        f"{report['runs']} runs on {report['workers']} workers in {report['elapsed_s']:.1f}s "
+        f"({report['runs_per_s']:.1f} runs/s, {report['ticks_per_s']:.0f} ticks/s)"
+    )
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(report["outcomes"].items())))
+    for stage, s in report["stages"].items():
+        clear = f"{s['clear_mean_s']:.1f}s" if s["clear_mean_s"] is not None else "-"
+        print(
+            f"stage {stage}: reached {s['reached']:5} cleared {s['cleared']:5} deaths {s['deaths']:4} "
+            f"timeouts {s['timeouts']:4} clear {clear:>7} damage {s['damage_mean']:6.1f} ammo {s['ammo_mean']:6.1f}"
+        )
+    if args.out:
+        if args.runs_out:
+            report["results"] = results
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,191 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from headless import HeadlessRunner
+
+SEED = 1234
+
+
+def spawn_enemies(game, count, rng, near_player=False):
+    kinds = (game.Slime, game.Phantom, game.Charger)
+    cells = game.reachable_positions(game.player.actor.pos, game.walls)
+    if near_player:
+        px, py = game.player.actor.pos
+        cells = [c for c in cells if math.hypot(c[0] - px, c[1] - py) <= game.DETECT_RANGE] or cells
+    for i in range(count):
+        pos = rng.choice(cells)
+        enemy = kinds[i * len(kinds) // count](pos, game.bounded_rect(pos, 200, 160), game.rng)
+        enemy.hp = 10 ** 9
+        game.enemies.append(enemy)
+
+
+def top_up_shots(pool, count, origins, rng, speed, ttl, radius, damage):
+    while pool.count < count:
+        x, y = rng.choice(origins)
+        angle = rng.random() * math.tau
+        pool.spawn(x, y, math.cos(angle), math.sin(angle), speed, ttl, radius, damage)
+
+
+class Scenario:
+    def __init__(self, name, enemies=0, bullets=0, turret_shots=0, turrets=0, near_player=False):
+        self.name = name
+        self.enemies = enemies
+        self.bullets = bullets
+        self.turret_shots = turret_shots
+        self.turrets = turrets
+        self.near_player = near_player
+
+    def setup(self, runner):
+        game = runner.game
+        runner.start(SEED)
+        self.rng = random.Random(SEED)
+        spawn_enemies(game, self.enemies, self.rng, self.near_player)
+        if self.turrets:
+            while len(game.turrets) < self.turrets:
+                game.turrets.extend(game.make_turrets(game.walls, game.rng))
+            del game.turrets[self.turrets:]
+        self.origins = game.reachable_positions(game.player.actor.pos, game.walls)
+        self.refill(game)
+
+    def refill(self, game):
+        game.game_state = "playing"
+        game.player.hp = game.PLAYER_HP
+        top_up_shots(game.bullets, self.bullets, self.origins, self.rng, game.BULLET_SPEED, 2.0, 5, 0)
+        top_up_shots(
+            game.turret_shots, self.turret_shots, self.origins, self.rng, game.TURRET_BULLET_SPEED, 3.0, 4, 0
+        )
+
+
+SCENARIOS = [
+    Scenario("baseline_stage1"),
+    Scenario("enemies_200", enemies=200),
+    Scenario("bullets_2000", enemies=20, bullets=2000),
+    Scenario("turret_shots_500", turret_shots=500),
+    Scenario("turrets_30", turrets=30),
+    Scenario("heavy_los", enemies=150, near_player=True),
+]
+
+
+def run_cold_reachable(game, dt):
+    game.nav_grids.clear()
+    game.reachable_positions(game.player.actor.pos, game.walls)
+
+
+def run_dirty_draw(game, dt):
+    game.last_drawn_state = "playing"
+    game.draw_playfield_dirty()
+
+
+SUBSYSTEMS = {
+    "update": lambda game, dt: game.update(dt),
+    "update_fireflies": lambda game, dt: game.update_fireflies(dt),
+    "update_spikes": lambda game, dt: game.update_spikes(dt),
+    "update_turrets": lambda game, dt: game.update_turrets(dt),
+    "enemy_updates": lambda game, dt: game.update_enemies(dt),
+    "update_player_shots": lambda game, dt: game.update_player_shots(dt, game.enemies, game.walls, game.bullets),
+    "update_turret_shots": lambda game, dt: game.update_turret_shots(dt, game.walls, game.turret_shots),
+    "collect_gems": lambda game, dt: game.collect_gems(),
+    "reachable_positions": run_cold_reachable,
+    "draw_playfield": lambda game, dt: game.draw_playfield(),
+    "draw_playfield_dirty": run_dirty_draw,
+}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        "n": n,
+        "mean_us": sum(ordered) / n * 1e6,
+        "p50_us": ordered[int(0.5 * (n - 1))] * 1e6,
+        "p99_us": ordered[int(0.99 * (n - 1))] * 1e6,
+    }
+
+
+def bench_scenario(runner, scenario, ticks, names):
+    game = runner.game
+    results = {}
+    for name in names:
+        fn = SUBSYSTEMS[name]
+        scenario.setup(runner)
+        screen = game.screen
+        if name.startswith("draw_"):
+            fn(game, runner.dt)
+        samples = []
+        calls = 0
+        for _ in range(ticks):
+            scenario.refill(game)
+            before = screen.draw.calls + screen.blits
+            start = time.perf_counter()
+            fn(game, runner.dt)
+            samples.append(time.perf_counter() - start)
+            calls += screen.draw.calls + screen.blits - before
+        results[name] = summarize(samples)
+        if name.startswith("draw_"):
+            results[name]["draw_calls"] = calls / ticks
+    return results
+
+
+def compare(current, baseline, threshold):
+    regressions = 0
+    for scenario, metrics in current["scenarios"].items():
+        for name, stats in metrics.items():
+            old = baseline.get("scenarios", {}).get(scenario, {}).get(name)
+            if not old:
+                continue
+            ratio = stats["mean_us"] / old["mean_us"] if old["mean_us"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  SLOWER"
+                regressions += 1
+            elif ratio < 1 - threshold:
+                flag = "  faster"
+            print(f"{scenario:18} {name:22} {old['mean_us']:10.1f} -> {stats['mean_us']:10.1f} us  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Forest Relic update/draw benchmarks")
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS])
+    parser.add_argument("--subsystem", action="append", choices=list(SUBSYSTEMS))
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a JSON file from an earlier --out")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    runner = HeadlessRunner()
+    names = args.subsystem or list(SUBSYSTEMS)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "tick_rate": runner.game.TICK_RATE,
+        "scenarios": {},
+    }
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        report["scenarios"][scenario.name] = bench_scenario(runner, scenario, args.ticks, names)
+        total = report["scenarios"][scenario.name].get("update")
+        if total:
+            print(f"{scenario.name:18} update mean {total['mean_us']:9.1f} us  p99 {total['p99_us']:9.1f} us")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+import math
+import random
+import sys
+import time
+
+import main
+
+
+def sampled_line_of_sight(a, b, walls, steps=10):
+    ax, ay = a
+    bx, by = b
+    for i in range(1, steps):
+        t = i / steps
+        x = ax + (bx - ax) * t
+        y = ay + (by - ay) * t
+        if any(main.Rect(w).collidepoint(x, y) for w in walls):
+            return False
+    return True
+
+
+def make_queries(count, seed=7):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        a = (rng.uniform(0, main.WIDTH), rng.uniform(0, main.HEIGHT))
+        angle = rng.random() * math.tau
+        reach = rng.uniform(20, main.DETECT_RANGE)
+        b = (a[0] + reach * math.cos(angle), a[1] + reach * math.sin(angle))
+        queries.append((a, b))
+    return queries
+
+
+def time_queries(check, queries, walls, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for a, b in queries:
+            check(a, b, walls)
+    return (time.perf_counter() - start) / (rounds * len(queries))
+
+
+def exact_uncached(a, b, walls):
+    main.los_cache.clear()
+    return main.has_line_of_sight(a, b, walls)
+
+
+def run(count=2000, rounds=5):
+    walls = main.build_walls()
+    queries = make_queries(count)
+    sampled = time_queries(sampled_line_of_sight, queries, walls, rounds)
+    exact = time_queries(exact_uncached, queries, walls, rounds)
+    main.los_cache.clear()
+    cached = time_queries(main.has_line_of_sight, queries, walls, rounds)
+    missed = sum(
+        1 for a, b in queries if sampled_line_of_sight(a, b, walls) and not exact_uncached(a, b, walls)
+    )
+    print(f"queries: {count} x {rounds}")
+    print(f"sampled (10 points): {sampled * 1e6:8.2f} us/query")
+    print(f"exact segment test:  {exact * 1e6:8.2f} us/query")
+    print(f"exact, cached:       {cached * 1e6:8.2f} us/query")
+    print(f"sampler saw through a wall on {missed} of {count} segments")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+
+FLOAT_COLUMNS = (
+    "x",
+    "y",
+    "w",
+    "h",
+    "min_x",
+    "max_x",
+    "min_y",
+    "max_y",
+    "area_left",
+    "area_top",
+    "area_right",
+    "area_bottom",
+    "speed",
+    "pause_timer",
+    "frame_timer",
+)
+INT_COLUMNS = ("walking", "frame")
+
+
+class EnemyStore:
+    def __init__(self, floats=(), ints=(), capacity=16):
+        self.float_columns = FLOAT_COLUMNS + tuple(floats)
+        self.int_columns = INT_COLUMNS + tuple(ints)
+        self.lock = threading.Lock()
+        self.capacity = 0
+        self.count = 0
+        for name in self.float_columns:
+            setattr(self, name, np.zeros(0, dtype=np.float64))
+        for name in self.int_columns:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        self.grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self, capacity):
+        if capacity <= self.capacity:
+            return
+        for name in self.float_columns + self.int_columns:
+            old = getattr(self, name)
+            column = np.zeros(capacity, dtype=old.dtype)
+            column[: self.capacity] = old
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def claim(self):
+        with self.lock:
+            if self.count == self.capacity:
+                self.grow(max(16, self.capacity * 2))
+            slot = self.count
+            self.count += 1
+            return slot
+
+    def put(self, slot, **values):
+        with self.lock:
+            for name, value in values.items():
+                getattr(self, name)[slot] = value
+
+
+def column(name, kind=float):
+    def get(self):
+        return kind(getattr(self.store, name)[self.slot])
+
+    def put(self, value):
+        self.store.put(self.slot, **{name: value})
+
+    return property(get, put)
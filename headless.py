@@ -0,0 +1,242 @@
+import os
+import struct
+import sys
+import time
+
+from audio import NullAudio
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+image_sizes = {}
+
+
+def image_size(name):
+    size = image_sizes.get(name)
+    if size is None:
+        with open(os.path.join(IMAGE_DIR, name + ".png"), "rb") as f:
+            header = f.read(24)
+        size = struct.unpack(">II", header[16:24])
+        image_sizes[name] = size
+    return size
+
+
+class StubActor:
+    def __init__(self, image, pos=(0, 0), **kwargs):
+        self.image = image
+        self.scale = 1.0
+        self.width, self.height = image_size(image)
+        self.anchor_x = self.width * 0.5
+        self.anchor_y = self.height * 0.5
+        self.left = 0
+        self.top = 0
+        self.pos = pos
+
+    @property
+    def x(self):
+        return self.left + self.anchor_x
+
+    @x.setter
+    def x(self, value):
+        self.left = value - self.anchor_x
+
+    @property
+    def y(self):
+        return self.top + self.anchor_y
+
+    @y.setter
+    def y(self, value):
+        self.top = value - self.anchor_y
+
+    @property
+    def pos(self):
+        return (self.left + self.anchor_x, self.top + self.anchor_y)
+
+    @pos.setter
+    def pos(self, value):
+        self.left = value[0] - self.anchor_x
+        self.top = value[1] - self.anchor_y
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+    def draw(self):
+        pass
+
+
+class StubKeyboard:
+    def __init__(self):
+        self.held = set()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return name in self.held
+
+    def press(self, *names):
+        self.held.update(names)
+
+    def release(self, *names):
+        self.held.difference_update(names)
+
+    def release_all(self):
+        self.held.clear()
+
+
+class StubKeys:
+    ESCAPE = 27
+    R = 114
+    F3 = 1073741884
+    F5 = 1073741886
+    F6 = 1073741887
+    F9 = 1073741890
+    BACKSPACE = 8
+
+
+class StubMouse:
+    def __init__(self):
+        self.pos = (0, 0)
+
+
+class SilentSound:
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class StubSounds:
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return SilentSound()
+
+
+class StubMusic:
+    def play(self, name):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+
+class CountingDraw:
+    def __init__(self):
+        self.calls = 0
+
+    def line(self, *args, **kwargs):
+        self.calls += 1
+
+    def circle(self, *args, **kwargs):
+        self.calls += 1
+
+    def filled_circle(self, *args, **kwargs):
+        self.calls += 1
+
+    def rect(self, *args, **kwargs):
+        self.calls += 1
+
+    def filled_rect(self, *args, **kwargs):
+        self.calls += 1
+
+    def text(self, *args, **kwargs):
+        self.calls += 1
+
+
+class StubSurface:
+    def __init__(self, screen):
+        self.screen = screen
+
+    def copy(self):
+        return StubSurface(self.screen)
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        self.screen.blits += 1
+
+    def blits(self, blit_sequence, doreturn=True):
+        self.screen.blits += len(blit_sequence)
+
+
+class StubScreen:
+    def __init__(self):
+        self.draw = CountingDraw()
+        self.blits = 0
+        self.surface = StubSurface(self)
+
+    def blit(self, image, pos):
+        self.blits += 1
+
+    def clear(self):
+        pass
+
+    def fill(self, color):
+        pass
+
+
+def install(game):
+    game.Actor = StubActor
+    game.screen = StubScreen()
+    game.keyboard = StubKeyboard()
+    game.keys = StubKeys
+    game.mouse = StubMouse()
+    game.sounds = StubSounds()
+    game.music = StubMusic()
+    game.PRELOAD_ASSETS = False
+    game.audio = NullAudio()
+    return game
+
+
+class HeadlessRunner:
+    def __init__(self, game=None, dt=None, draw=False):
+        if game is None:
+            import main as game
+        self.game = install(game)
+        self.dt = dt if dt is not None else 1 / game.TICK_RATE
+        self.draw = draw
+        self.ticks = 0
+
+    def start(self, seed=None):
+        self.game.start_game(seed)
+
+    def step(self):
+        self.game.update(self.dt)
+        if self.draw:
+            self.game.draw()
+        self.ticks += 1
+
+    def run(self, ticks, controller=None):
+        for _ in range(ticks):
+            if controller is not None:
+                controller(self)
+            self.step()
+            if self.game.game_state != "playing":
+                break
+        return self.ticks
+
+
+def main(argv):
+    numbers = [int(arg) for arg in argv if arg.isdigit()]
+    ticks = numbers[0] if numbers else 10000
+    seed = numbers[1] if len(numbers) > 1 else None
+    runner = HeadlessRunner(draw="--draw" in argv)
+    runner.start(seed)
+    start = time.perf_counter()
+    done = runner.run(ticks)
+    elapsed = time.perf_counter() - start
+    game = runner.game
+    print(f"{done} ticks in {elapsed:.2f}s ({done / elapsed:.0f} ticks/s)")
+    print(f"seed={game.game_seed} state={game.game_state} stage={game.stage} hp={game.player.hp} enemies={len(game.enemies)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,7 +1,34 @@
 import math
+import os
 import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from pgzero.actor import Actor
-from rect_stub import Rect
+from rect_stub import (
+    Rect,
+    edges_overlap_many,
+    path_hits,
+    path_touches,
+    segment_entries,
+    segment_entry_many,
+    sweep_edges,
+    sweep_edges_many,
+)
+from spatial_hash import SpatialHash
+from wall_mask import WallMask
+from projectiles import ProjectilePool
+from enemy_store import EnemyStore, column
+from nav_grid import FlowField, NavGrid
+from replay import Recorder
+from profiler import FrameProfiler
+from pools import Pool
+from particles import FireflySwarm
+from sprite_atlas import SpriteAtlas
+from assets import AssetLoader, warm_file
+from text_cache import TextCache
+from audio import AudioDispatcher
+import snapshot
 
 
 TITLE = "Forest Relic"
@@ -10,6 +37,8 @@ HEIGHT = 480
 SPRITE_SCALE = 1.6
 HUGE_SCALE = 1.9
 MAX_STAGE = 3
+BASE_SLIMES = 2
+CHARGER_FROM_STAGE = 2
 DETECT_RANGE = 260
 PLAYER_SPEED = 140
 PLAYER_HP = 100
@@ -25,6 +54,26 @@ TURRET_COOLDOWN = 1.8
 TURRET_DAMAGE = 10
 HEART_HEAL = 20
 BULLET_DAMAGE = 20
+DIRTY_RECTS = False
+TICK_RATE = 60
+MAX_TICKS_PER_FRAME = 5
+RECORD_DIR = None
+GRID_CELL = 64
+CHASE_STEP = 12
+CHASE_CLEARANCE = 8
+FIREFLY_COUNT = 22
+PRELOAD_ASSETS = True
+PREPARE_STAGES = True
+SNAPSHOT_EVERY = 30
+SNAPSHOT_RING = 20
+SAVE_PATH = "quicksave.frs"
+TEXT_CACHE_BYTES = 1 << 20
+MAX_VOICES = 6
+SOUND_RULES = {
+    "hurt": (0, 0.12),
+    "collect": (1, 0.05),
+    "hit": (2, 0.06),
+}
 
 SKY_TOP = (14, 44, 58)
 SKY_BOTTOM = (10, 26, 32)
@@ -88,6 +137,14 @@ class SpriteAnimation:
     def frame(self):
         return self.frames[self.index]
 
+    def prepare(self, atlas, scale):
+        self.surfaces = [atlas.frame(name, scale) for name in self.frames]
+        self.half_w, self.half_h = (n / 2 for n in atlas.size(self.frames[0], scale))
+
+    @property
+    def surface(self):
+        return self.surfaces[self.index]
+
 
 def actor_rect(actor, pos=None):
     x, y = pos if pos else (actor.x, actor.y)
@@ -95,11 +152,14 @@ def actor_rect(actor, pos=None):
 
 
 class Character:
-    def __init__(self, pos, animations):
+    def __init__(self, pos, animations, scale=SPRITE_SCALE):
         self.animations = animations
         self.state = "idle"
         self.actor = Actor(self.animations[self.state].frame, pos=pos)
-        self.actor.scale = SPRITE_SCALE
+        self.actor.scale = scale
+        self.frame_scale = atlas_scale(self.actor, scale)
+        for anim in animations.values():
+            anim.prepare(sprite_atlas, self.frame_scale)
 
     def set_state(self, state):
         if state != self.state:
@@ -107,12 +167,20 @@ class Character:
             self.animations[self.state].reset()
 
     def update_animation(self, dt):
-        anim = self.animations[self.state]
-        anim.update(dt)
-        self.actor.image = anim.frame
+        self.animations[self.state].update(dt)
+
+    def animation_state(self, name):
+        anim = self.animations[name]
+        return anim.index, anim.timer
+
+    def restore_animation(self, name, index, timer):
+        anim = self.animations[name]
+        anim.index = index
+        anim.timer = timer
 
     def draw(self):
-        self.actor.draw()
+        anim = self.animations[self.state]
+        screen.blit(anim.surface, (self.actor.x - anim.half_w, self.actor.y - anim.half_h))
 
 
 class Player(Character):
@@ -121,7 +189,8 @@ class Player(Character):
             "idle": SpriteAnimation([f"hero_idle_{i}" for i in range(1, 4)], 0.18),
             "walk": SpriteAnimation([f"hero_walk_{i}" for i in range(1, 4)], 0.12),
         }
-        super().__init__(pos, animations)
+        super().__init__(pos, animations, HUGE_SCALE)
+        self.prev_pos = pos
         self.speed = PLAYER_SPEED
         self.hp = PLAYER_HP
         self.invulnerable = 0.0
@@ -133,6 +202,7 @@ class Player(Character):
         self.reload_timer = 0.0
 
     def update(self, dt, walls):
+        self.prev_pos = self.actor.pos
         dx = (keyboard.right or keyboard.d) - (keyboard.left or keyboard.a)
         dy = (keyboard.down or keyboard.s) - (keyboard.up or keyboard.w)
         if dx or dy:
@@ -162,31 +232,29 @@ class Player(Character):
         self.update_animation(dt)
 
     def try_move(self, dx, dy, dt, walls):
-        moved = False
-        step_x = dx * self.speed * dt
-        step_y = dy * self.speed * dt
-
-        new_rect_x = actor_rect(self.actor, (self.actor.x + step_x, self.actor.y))
-        if not any(new_rect_x.colliderect(w) for w in walls):
-            self.actor.x += step_x
-            moved = True
-
-        new_rect_y = actor_rect(self.actor, (self.actor.x, self.actor.y + step_y))
-        if not any(new_rect_y.colliderect(w) for w in walls):
-            self.actor.y += step_y
-            moved = True
-
-        self.actor.x = clamp(self.actor.x, self.actor.width / 2, WIDTH - self.actor.width / 2)
-        self.actor.y = clamp(self.actor.y, self.actor.height / 2, HEIGHT - self.actor.height / 2)
-        return moved
+        edges = wall_mask_for(walls).rects.edges
+        actor = self.actor
+        w = actor.width
+        h = actor.height
+        x = actor.x
+        y = actor.y
+        left = x - w / 2
+        top = y - h / 2
+        step_x = sweep_edges(edges, left, left + w, top, top + h, dx * self.speed * dt, 0)
+        x += step_x
+        left = x - w / 2
+        step_y = sweep_edges(edges, top, top + h, left, left + w, dy * self.speed * dt, 1)
+        y += step_y
+        actor.x = clamp(x, w / 2, WIDTH - w / 2)
+        actor.y = clamp(y, h / 2, HEIGHT - h / 2)
+        return step_x != 0 or step_y != 0
 
     def hit(self, amount):
         if self.invulnerable > 0:
             return
         self.hp = max(0, self.hp - amount)
         self.invulnerable = 0.7
-        if sound_on:
-            sounds.hurt.play()
+        audio.post("hurt")
 
     def reload(self):
         if self.reloading:
@@ -198,67 +266,147 @@ class Player(Character):
         self.reloading = True
         self.reload_timer = self.reload_time
 
-    def shoot(self, target):
+    def shoot(self, target, shots):
         if self.reloading:
-            return None
+            return False
         if self.ammo <= 0:
             self.reload()
-            return None
+            return False
         self.ammo -= 1
         dx = target[0] - self.actor.x
         dy = target[1] - self.actor.y
         length = math.hypot(dx, dy) or 1
         dx /= length
         dy /= length
-        bullet = {
-            "x": self.actor.x,
-            "y": self.actor.y,
-            "dx": dx,
-            "dy": dy,
-            "speed": BULLET_SPEED,
-            "ttl": 2.0,
-            "radius": 5,
-        }
-        return bullet
+        shots.spawn(self.actor.x, self.actor.y, dx, dy, BULLET_SPEED, 2.0, 5, BULLET_DAMAGE)
+        return True
 
 
 class Enemy(Character):
-    def __init__(self, pos, animations, area, speed):
-        super().__init__(pos, animations)
+    max_hp = 40
+    code = None
+    store = EnemyStore(
+        floats=("idle_speed", "walk_speed", "angle", "dash_cooldown", "dash_timer", "dash_speed", "dash_time", "stride"),
+        ints=("kind", "idle_frames", "walk_frames", "direction", "dashing"),
+    )
+
+    x = column("x")
+    y = column("y")
+    w = column("w")
+    h = column("h")
+    min_x = column("min_x")
+    max_x = column("max_x")
+    min_y = column("min_y")
+    max_y = column("max_y")
+    speed = column("speed")
+    pause_timer = column("pause_timer")
+    walking = column("walking", bool)
+    frame = column("frame", int)
+    frame_timer = column("frame_timer")
+
+    def __init__(self, pos, animations, area, speed, rng):
+        self.slot = self.store.claim()
+        super().__init__(pos, animations, HUGE_SCALE)
+        self.store.put(
+            self.slot,
+            kind=self.code,
+            speed=speed,
+            idle_speed=animations["idle"].speed,
+            walk_speed=animations["walk"].speed,
+            idle_frames=len(animations["idle"].frames),
+            walk_frames=len(animations["walk"].frames),
+        )
+        self.reset(pos, area, rng)
+
+    @property
+    def state(self):
+        return "walk" if self.walking else "idle"
+
+    @state.setter
+    def state(self, state):
+        self.walking = state == "walk"
+
+    @property
+    def pos(self):
+        return (self.x, self.y)
+
+    def reset(self, pos, area, rng):
+        self.rng = rng
         self.area = area
-        self.speed = speed
-        self.pause_timer = 0.0
-        self.hp = 40
+        self.hp = self.max_hp
+        w = self.actor.width
+        h = self.actor.height
+        self.store.put(
+            self.slot,
+            x=pos[0],
+            y=pos[1],
+            w=w,
+            h=h,
+            min_x=area.left + w / 2,
+            max_x=area.right - w / 2,
+            min_y=area.top + h / 2,
+            max_y=area.bottom - h / 2,
+            area_left=area.left,
+            area_top=area.top,
+            area_right=area.right,
+            area_bottom=area.bottom,
+            pause_timer=0.0,
+            walking=0,
+            frame=0,
+            frame_timer=0.0,
+        )
+        self.actor.pos = pos
+
+    def place(self, x, y):
+        self.store.put(self.slot, x=x, y=y)
+        self.actor.pos = (x, y)
+
+    def set_state(self, state):
+        if state != self.state:
+            self.store.put(self.slot, walking=state == "walk", frame=0, frame_timer=0.0)
 
-    def keep_inside(self):
-        self.actor.x = clamp(self.actor.x, self.area.left + self.actor.width / 2, self.area.right - self.actor.width / 2)
-        self.actor.y = clamp(self.actor.y, self.area.top + self.actor.height / 2, self.area.bottom - self.actor.height / 2)
+    def animation_state(self, name):
+        if name != self.state:
+            return 0, 0.0
+        return self.frame, self.frame_timer
+
+    def restore_animation(self, name, index, timer):
+        if name == self.state:
+            self.store.put(self.slot, frame=index, frame_timer=timer)
+
+    def draw(self):
+        anim = self.animations[self.state]
+        screen.blit(anim.surfaces[self.frame], (self.x - anim.half_w, self.y - anim.half_h))
+
+    def slide(self, step_x, step_y, mask):
+        x = self.x
+        y = self.y
+        w = self.w
+        h = self.h
+        edges = mask.rects.edges
+        left = x - w / 2
+        top = y - h / 2
+        x += sweep_edges(edges, left, left + w, top, top + h, step_x, 0)
+        left = x - w / 2
+        y += sweep_edges(edges, top, top + h, left, left + w, step_y, 1)
+        self.place(clamp(x, self.min_x, self.max_x), clamp(y, self.min_y, self.max_y))
 
     def take_damage(self, amount):
         self.hp -= amount
-        if sound_on:
-            try:
-                sounds.hit.play()
-            except Exception:
-                pass
+        audio.post("hit")
 
     def move_with_collisions(self, dx, dy, dt, walls):
-        step_x = dx * self.speed * dt
-        step_y = dy * self.speed * dt
-        rect_x = actor_rect(self.actor, (self.actor.x + step_x, self.actor.y))
-        if not any(rect_x.colliderect(w) for w in walls):
-            self.actor.x += step_x
-        rect_y = actor_rect(self.actor, (self.actor.x, self.actor.y + step_y))
-        if not any(rect_y.colliderect(w) for w in walls):
-            self.actor.y += step_y
-        self.keep_inside()
+        self.slide(dx * self.speed * dt, dy * self.speed * dt, wall_mask_for(walls))
+
+    def update(self, dt):
+        update_enemy_batch([self], dt, player.prev_pos, player.actor.pos, actor_box(player.actor), wall_mask_for(walls))
 
     def push_from_player(self, player_pos, walls):
-        dx = self.actor.x - player_pos[0]
-        dy = self.actor.y - player_pos[1]
+        dx = self.x - player_pos[0]
+        dy = self.y - player_pos[1]
         dist = math.hypot(dx, dy)
         if dist == 0:
-            dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+            dx, dy = self.rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
             dist = 1
         dx /= dist
         dy /= dist
@@ -266,113 +414,273 @@ class Enemy(Character):
 
 
 class Slime(Enemy):
-    def __init__(self, pos, area):
+    code = 0
+    direction = column("direction", int)
+
+    def __init__(self, pos, area, rng):
         animations = {
             "idle": SpriteAnimation([f"slime_idle_{i}" for i in range(1, 4)], 0.24),
             "walk": SpriteAnimation([f"slime_walk_{i}" for i in range(1, 4)], 0.16),
         }
-        super().__init__(pos, animations, area, speed=65)
-        self.direction = random.choice([-1, 1])
+        super().__init__(pos, animations, area, speed=65, rng=rng)
 
-    def update(self, dt):
-        if self.pause_timer > 0:
-            self.pause_timer -= dt
-            self.set_state("idle")
-        else:
-            px, py = player.actor.pos
-            dx = px - self.actor.x
-            dy = py - self.actor.y
-            dist = math.hypot(dx, dy)
-            if dist <= DETECT_RANGE and has_line_of_sight(self.actor.pos, player.actor.pos, walls):
-                dx /= dist or 1
-                dy /= dist or 1
-                self.move_with_collisions(dx, dy, dt, walls)
-            else:
-                self.move_with_collisions(self.direction, 0, dt, walls)
-                if self.actor.left <= self.area.left or self.actor.right >= self.area.right or any(
-                    actor_rect(self.actor).colliderect(w) for w in walls
-                ):
-                    self.direction *= -1
-                    self.pause_timer = 0.45
-            self.set_state("walk")
-
-        self.keep_inside()
-        self.update_animation(dt)
+    def reset(self, pos, area, rng):
+        super().reset(pos, area, rng)
+        self.direction = rng.choice([-1, 1])
 
 
 class Phantom(Enemy):
-    def __init__(self, pos, area):
+    code = 1
+    angle = column("angle")
+
+    def __init__(self, pos, area, rng):
         animations = {
             "idle": SpriteAnimation([f"phantom_idle_{i}" for i in range(1, 4)], 0.22),
             "walk": SpriteAnimation([f"phantom_walk_{i}" for i in range(1, 4)], 0.14),
         }
-        super().__init__(pos, animations, area, speed=80)
-        self.angle = random.random() * math.pi * 2
+        super().__init__(pos, animations, area, speed=80, rng=rng)
 
-    def update(self, dt):
-        if self.pause_timer > 0:
-            self.pause_timer -= dt
-            self.set_state("idle")
-        else:
-            self.angle += dt * 1.3
-            px, py = player.actor.pos
-            dxp = px - self.actor.x
-            dyp = py - self.actor.y
-            dist = math.hypot(dxp, dyp)
-            if dist <= DETECT_RANGE and has_line_of_sight(self.actor.pos, player.actor.pos, walls):
-                dx = dxp / (dist or 1)
-                dy = dyp / (dist or 1)
-            else:
-                dx = math.cos(self.angle)
-                dy = math.sin(self.angle)
-            self.move_with_collisions(dx, dy, dt, walls)
-            if not self.area.collidepoint(self.actor.x, self.actor.y):
-                self.angle += math.pi
-                self.pause_timer = 0.5
-            self.set_state("walk")
-
-        self.keep_inside()
-        self.update_animation(dt)
+    def reset(self, pos, area, rng):
+        super().reset(pos, area, rng)
+        self.angle = rng.random() * math.pi * 2
 
 
 class Charger(Enemy):
-    def __init__(self, pos, area):
+    code = 2
+    max_hp = 50
+    dash_cooldown = column("dash_cooldown")
+    dash_timer = column("dash_timer")
+    dash_speed = column("dash_speed")
+    dashing = column("dashing", bool)
+    dash_time = column("dash_time")
+    stride = column("stride")
+
+    def __init__(self, pos, area, rng):
         animations = {
             "idle": SpriteAnimation([f"slime_idle_{i}" for i in range(1, 4)], 0.14),
             "walk": SpriteAnimation([f"slime_walk_{i}" for i in range(1, 4)], 0.1),
         }
-        super().__init__(pos, animations, area, speed=120)
-        self.hp = 50
+        super().__init__(pos, animations, area, speed=120, rng=rng)
+
+    def reset(self, pos, area, rng):
+        super().reset(pos, area, rng)
         self.dash_cooldown = 1.2
-        self.dash_timer = random.random()
+        self.dash_timer = rng.random()
         self.dash_speed = 200
         self.dashing = False
         self.dash_time = 0.4
 
-    def update(self, dt):
-        self.dash_timer -= dt
-        speed = self.dash_speed if self.dashing else self.speed
-        if self.dash_timer <= 0:
-            self.dash_timer = self.dash_cooldown
-            self.dashing = True
-            self.dash_time = 0.35
-        if self.dashing:
-            self.dash_time -= dt
-            if self.dash_time <= 0:
-                self.dashing = False
-        dx = player.actor.x - self.actor.x
-        dy = player.actor.y - self.actor.y
-        dist = math.hypot(dx, dy) or 1
-        if dist <= DETECT_RANGE and has_line_of_sight(self.actor.pos, player.actor.pos, walls):
-            dx /= dist
-            dy /= dist
-        else:
-            dx = random.choice([-1, 1])
-            dy = random.choice([-1, 1])
-        self.move_with_collisions(dx * (speed / self.speed), dy * (speed / self.speed), dt, walls)
-        self.keep_inside()
-        self.set_state("walk" if dist > 4 else "idle")
-        self.update_animation(dt)
+    def wander(self, dt, mask):
+        stride = self.stride
+        dx = self.rng.choice([-1, 1])
+        dy = self.rng.choice([-1, 1])
+        self.slide(dx * stride * dt, dy * stride * dt, mask)
+
+
+def actor_box(actor):
+    r = actor_rect(actor)
+    return (r.left, r.top, r.right, r.bottom)
+
+
+def update_enemy_batch(group, dt, player_from, player_pos, player_box, mask, settle=None):
+    store = Enemy.store
+    slots = np.fromiter((enemy.slot for enemy in group), dtype=np.intp, count=len(group))
+    with store.lock:
+        kind = store.kind[slots]
+        x = store.x[slots]
+        y = store.y[slots]
+        speed = store.speed[slots]
+        pause = store.pause_timer[slots]
+        active = pause <= 0
+        dx = player_pos[0] - x
+        dy = player_pos[1] - y
+        dist = np.hypot(dx, dy)
+        slimes = np.flatnonzero(kind == Slime.code)
+        phantoms = np.flatnonzero(kind == Phantom.code)
+        chargers = np.flatnonzero(kind == Charger.code)
+
+        if chargers.size:
+            rows = slots[chargers]
+            dashing = store.dashing[rows].astype(bool)
+            speed[chargers] = np.where(dashing, store.dash_speed[rows], speed[chargers])
+            dash_timer = store.dash_timer[rows] - dt
+            start = dash_timer <= 0
+            store.dash_timer[rows] = np.where(start, store.dash_cooldown[rows], dash_timer)
+            dash_time = np.where(start, 0.35, store.dash_time[rows])
+            dashing |= start
+            dash_time = np.where(dashing, dash_time - dt, dash_time)
+            store.dash_time[rows] = dash_time
+            store.dashing[rows] = dashing & (dash_time > 0)
+            store.stride[rows] = speed[chargers]
+            dist[chargers] = np.where(dist[chargers] == 0, 1.0, dist[chargers])
+        if phantoms.size:
+            rows = slots[phantoms]
+            angle = np.where(active[phantoms], store.angle[rows] + dt * 1.3, store.angle[rows])
+
+        steer, hx, hy = chase_steer(x, y, dx, dy, dist, player_pos, mask, active)
+        if slimes.size:
+            direction = store.direction[slots[slimes]]
+            patrol = active[slimes] & ~steer[slimes]
+            hx[slimes] = np.where(patrol, direction, hx[slimes])
+        if phantoms.size:
+            hx[phantoms] = np.where(steer[phantoms], hx[phantoms], np.cos(angle))
+            hy[phantoms] = np.where(steer[phantoms], hy[phantoms], np.sin(angle))
+        drawn = None
+        if chargers.size:
+            drawn = np.zeros(len(group), dtype=bool)
+            drawn[chargers] = ~steer[chargers]
+            order = np.flatnonzero(drawn)
+            if order.size:
+                rngs = {id(group[k].rng): group[k].rng for k in order.tolist()}
+                saved = [(r, r.getstate()) for r in rngs.values()]
+                hx[order], hy[order] = np.array(
+                    [(e.rng.choice([-1, 1]), e.rng.choice([-1, 1])) for e in map(group.__getitem__, order.tolist())]
+                ).T
+            else:
+                drawn = None
+        moved_x, moved_y = slide_many(store, slots, x, y, hx * speed * dt, hy * speed * dt, mask, active)
+        wander = None
+        if drawn is not None and draws_clash(group, order, moved_x, moved_y, player_pos, rngs):
+            for r, state in saved:
+                r.setstate(state)
+            wander = drawn
+            moved_x = np.where(wander, x, moved_x)
+            moved_y = np.where(wander, y, moved_y)
+        x0 = x
+        y0 = y
+        x = moved_x
+        y = moved_y
+        walking = active.copy()
+
+        if slimes.size:
+            rows = slots[slimes]
+            w = store.w[rows]
+            h = store.h[rows]
+            left = x[slimes] - w / 2
+            top = y[slimes] - h / 2
+            bounced = patrol & (
+                (left <= store.area_left[rows])
+                | (x[slimes] + w / 2 >= store.area_right[rows])
+                | edges_overlap_many(mask.rects.columns, left, top, left + w, top + h)
+            )
+            store.direction[rows] = np.where(bounced, -direction, direction)
+            pause[slimes] = np.where(active[slimes], np.where(bounced, 0.45, pause[slimes]), pause[slimes] - dt)
+        if phantoms.size:
+            rows = slots[phantoms]
+            px = x[phantoms]
+            py = y[phantoms]
+            inside = (
+                (store.area_left[rows] <= px)
+                & (px <= store.area_right[rows])
+                & (store.area_top[rows] <= py)
+                & (py <= store.area_bottom[rows])
+            )
+            strayed = active[phantoms] & ~inside
+            store.angle[rows] = np.where(strayed, angle + math.pi, angle)
+            pause[phantoms] = np.where(active[phantoms], np.where(strayed, 0.5, pause[phantoms]), pause[phantoms] - dt)
+        if chargers.size:
+            walking[chargers] = dist[chargers] > 4
+
+        store.x[slots] = x
+        store.y[slots] = y
+        store.pause_timer[slots] = pause
+        animate_many(store, slots, walking, dt)
+    settle_batch(group, x0, y0, x, y, store, slots, player_from, player_box, mask, dt, settle, wander)
+
+
+def draws_clash(group, order, x, y, player_pos, rngs):
+    last = order[-1]
+    centred = np.flatnonzero((x[:last] == player_pos[0]) & (y[:last] == player_pos[1]))
+    if any(id(group[i].rng) in rngs for i in centred.tolist()):
+        return True
+    return id(rng) in rngs and any(enemy.hp <= 0 for enemy in group[:last])
+
+
+def chase_steer(x, y, dx, dy, dist, player_pos, mask, active):
+    steer = np.zeros(len(x), dtype=bool)
+    sx = np.zeros(len(x))
+    sy = np.zeros(len(x))
+    near = np.flatnonzero(active & (dist <= DETECT_RANGE))
+    if not near.size:
+        return steer, sx, sy
+    seen = mask.rects.sweep_many(x[near], y[near], player_pos[0], player_pos[1]) == np.inf
+    visible = near[seen]
+    scale = np.where(dist[visible] == 0, 1.0, dist[visible])
+    steer[visible] = True
+    sx[visible] = dx[visible] / scale
+    sy[visible] = dy[visible] / scale
+    if flow_field is not None:
+        for i in near[~seen].tolist():
+            step = flow_field.step_from((float(x[i]), float(y[i])))
+            if step:
+                steer[i] = True
+                sx[i], sy[i] = step
+    return steer, sx, sy
+
+
+def slide_many(store, slots, x, y, step_x, step_y, mask, moving):
+    columns = mask.rects.columns
+    w = store.w[slots]
+    h = store.h[slots]
+    left = x - w / 2
+    top = y - h / 2
+    x = x + np.where(moving, sweep_edges_many(columns, left, left + w, top, top + h, step_x, 0), 0.0)
+    left = x - w / 2
+    y = y + np.where(moving, sweep_edges_many(columns, top, top + h, left, left + w, step_y, 1), 0.0)
+    x = np.maximum(store.min_x[slots], np.minimum(x, store.max_x[slots]))
+    y = np.maximum(store.min_y[slots], np.minimum(y, store.max_y[slots]))
+    return x, y
+
+
+def animate_many(store, slots, walking, dt):
+    changed = walking != store.walking[slots].astype(bool)
+    frame = np.where(changed, 0, store.frame[slots])
+    timer = np.where(changed, 0.0, store.frame_timer[slots]) + dt
+    speed = np.where(walking, store.walk_speed[slots], store.idle_speed[slots])
+    count = np.where(walking, store.walk_frames[slots], store.idle_frames[slots])
+    due = timer >= speed
+    steps = np.floor(timer / speed).astype(np.int64)
+    store.frame_timer[slots] = np.where(due, timer - speed * steps, timer)
+    store.frame[slots] = np.where(due, (frame + steps) % count, frame)
+    store.walking[slots] = walking
+
+
+def settle_batch(group, x0, y0, x, y, store, slots, player_from, player_box, mask, dt, settle, wander=None):
+    for enemy, ex, ey in zip(group, x.tolist(), y.tolist()):
+        enemy.actor.pos = (ex, ey)
+    w = store.w[slots]
+    h = store.h[slots]
+    touching = contacts(x0, y0, x, y, w, h, player_from, player_box)
+    pending = touching | np.fromiter((enemy.hp <= 0 for enemy in group), dtype=bool, count=len(group))
+    if wander is not None:
+        pending |= wander
+    for k in np.flatnonzero(pending).tolist():
+        enemy = group[k]
+        if wander is not None and wander[k]:
+            enemy.wander(dt, mask)
+            row = slice(k, k + 1)
+            x[row], y[row] = enemy.pos
+            touching[k] = contacts(x0[row], y0[row], x[row], y[row], w[row], h[row], player_from, player_box)[0]
+        if settle is not None and (touching[k] or enemy.hp <= 0):
+            settle(enemy, bool(touching[k]))
+
+
+def contacts(x0, y0, x, y, w, h, player_from, player_box):
+    b_left, b_top, b_right, b_bottom = player_box
+    half_w = w / 2
+    half_h = h / 2
+    reach = np.array([b_left - half_w, b_top - half_h, b_right + half_w, b_bottom + half_h])[:, :, None]
+    moved_into = path_hits(x0, y0, x, y, reach)[:, 0]
+    player_w = (b_right - b_left) / 2
+    player_h = (b_bottom - b_top) / 2
+    left = x0 - half_w
+    top = y0 - half_h
+    bodies = np.array([left - player_w, top - player_h, left + w + player_w, top + h + player_h])
+    ax, ay = player_from
+    bx = b_left + player_w
+    by = b_top + player_h
+    run_into = path_hits(np.array([ax]), np.array([ay]), np.array([bx]), np.array([by]), bodies)[0]
+    return moved_into | run_into
 
 
 class Button:
@@ -391,7 +699,7 @@ class Button:
         border = (255, 255, 255) if hovered else (210, 220, 240)
         fill_rect(self.rect, base_color)
         outline_rect(self.rect, border)
-        screen.draw.text(
+        draw_text(
             self.text,
             center=self.rect.center,
             fontsize=28,
@@ -418,12 +726,39 @@ title_wave = 0.0
 game_time = 0.0
 exit_unlocked = False
 fireflies = []
-bullets = []
+bullets = ProjectilePool(256)
 spikes = []
 turrets = []
-turret_shots = []
+turret_shots = ProjectilePool(64)
 hearts = []
 stage = 1
+rng = random.Random()
+game_seed = None
+tick_accumulator = 0.0
+recorder = None
+profiler = FrameProfiler()
+sprite_atlas = SpriteAtlas()
+text_cache = TextCache(TEXT_CACHE_BYTES)
+audio = AudioDispatcher(lambda name: getattr(sounds, name), SOUND_RULES, MAX_VOICES)
+asset_loader = None
+stage_planner = None
+next_stage = None
+snapshots = snapshot.SnapshotRing(SNAPSHOT_RING, SNAPSHOT_EVERY)
+layer_cache = {}
+wall_mask = None
+nav_grids = {}
+flow_field = None
+los_cache = {}
+gem_grid = SpatialHash(GRID_CELL)
+heart_grid = SpatialHash(GRID_CELL)
+spike_grid = SpatialHash(GRID_CELL)
+dirty_rects = []
+last_drawn_state = None
+HUD_AREAS = [
+    Rect((0, 0), (WIDTH, 70)),
+    Rect((WIDTH - 150, HEIGHT - 56), (150, 56)),
+]
+PROFILER_AREA = Rect((0, 72), (300, 260))
 
 
 def build_walls():
@@ -445,18 +780,25 @@ def build_walls():
     ]
 
 
-def make_fireflies(count=22):
-    bugs = []
-    for _ in range(count):
-        bugs.append(
-            {
-                "x": random.uniform(0, WIDTH),
-                "y": random.uniform(0, HEIGHT),
-                "speed": random.uniform(8, 18),
-                "phase": random.random() * math.pi * 2,
-            }
-        )
-    return bugs
+def wall_mask_for(walls):
+    global wall_mask
+    if wall_mask is None or wall_mask.walls is not walls:
+        wall_mask = WallMask(walls, WIDTH, HEIGHT)
+        los_cache.clear()
+    return wall_mask
+
+
+def nav_grid_for(walls, step=24, margin=18, mask=None, clearance=0):
+    key = (tuple((w.x, w.y, w.width, w.height) for w in walls), step, margin, clearance)
+    grid = nav_grids.get(key)
+    if grid is None:
+        grid = NavGrid(mask or wall_mask_for(walls), WIDTH, HEIGHT, step, margin, clearance)
+        nav_grids[key] = grid
+    return grid
+
+
+def make_fireflies(rng, count=FIREFLY_COUNT):
+    return FireflySwarm(count, WIDTH, HEIGHT, rng)
 
 
 def make_spikes():
@@ -468,74 +810,186 @@ def make_spikes():
     return [{"rect": pad, "timer": 0.0, "period": 1.6, "active": False} for pad in pads]
 
 
-def make_turrets(walls):
+def atlas_scale(actor, scale):
+    if actor.width == sprite_atlas.base_sizes[actor.image][0]:
+        return 1.0
+    return scale
+
+
+def draw_sprite(act):
+    w, h = sprite_atlas.size(act.image, act.frame_scale)
+    screen.blit(sprite_atlas.frame(act.image, act.frame_scale), (act.x - w / 2, act.y - h / 2))
+
+
+def new_sprite(image, pos):
+    act = Actor(image, pos=pos)
+    act.scale = HUGE_SCALE
+    act.frame_scale = atlas_scale(act, HUGE_SCALE)
+    return act
+
+
+def place_sprite(act, pos):
+    act.pos = pos
+
+
+def new_turret(pos, timer):
+    return {"actor": new_sprite("turret", pos), "cooldown": TURRET_COOLDOWN, "timer": timer, "range": TURRET_RANGE}
+
+
+def reset_turret(turret, pos, timer):
+    turret["actor"].pos = pos
+    turret["cooldown"] = TURRET_COOLDOWN
+    turret["timer"] = timer
+    turret["range"] = TURRET_RANGE
+
+
+gem_pool = Pool(lambda pos: new_sprite("gem", pos), place_sprite)
+heart_pool = Pool(lambda pos: new_sprite("heart", pos), place_sprite)
+turret_pool = Pool(new_turret, reset_turret)
+enemy_pools = {kind: Pool(kind, kind.reset) for kind in (Slime, Phantom, Charger)}
+
+
+def recycle_stage():
+    for enemy in enemies:
+        enemy_pools[type(enemy)].release(enemy)
+    gem_pool.release_all(gems)
+    heart_pool.release_all(hearts)
+    turret_pool.release_all(turrets)
+
+
+def make_turrets(walls, rng):
     t_list = []
     cells = reachable_positions((WIDTH / 2, HEIGHT / 2), walls)
-    random.shuffle(cells)
+    rng.shuffle(cells)
     for pos in cells[:3]:
-        act = Actor("turret", pos=pos)
-        act.scale = HUGE_SCALE
-        t_list.append({"actor": act, "cooldown": TURRET_COOLDOWN, "timer": random.random(), "range": TURRET_RANGE})
+        t_list.append(turret_pool.acquire(pos, rng.random()))
     return t_list
 
 
-def create_game_objects():
-    global gems, enemies, walls, player, total_gems, exit_unlocked, bullets, spikes, turrets, turret_shots, hearts
+def stage_rng(seed, stage_no):
+    return random.Random(f"{seed}/{stage_no}")
+
+
+def plan_stage(seed, stage_no, spare_counts=None):
+    rng = stage_rng(seed, stage_no)
     walls = build_walls()
+    mask = WallMask(walls, WIDTH, HEIGHT)
+    nav = nav_grid_for(walls, mask=mask)
     player_start = (80, 430)
-    player_anim = Player(player_start)
-    player_anim.actor.scale = HUGE_SCALE
-    free_cells = reachable_positions(player_start, walls)
-
-    enemies[:] = []
-    spawn_pool = list(free_cells)
-    random.shuffle(spawn_pool)
-
-    def pop_spawn(min_dist=120):
-        while spawn_pool:
-            pos = spawn_pool.pop()
-            if math.hypot(pos[0] - player_start[0], pos[1] - player_start[1]) >= min_dist:
-                return pos
+    spawn_pool = nav.spawn_cells(player_start, 120)
+    rng.shuffle(spawn_pool)
+
+    def pop_spawn():
+        if spawn_pool:
+            return spawn_pool.pop()
         return player_start
 
-    for _ in range(2 + stage):
+    enemy_specs = []
+    for _ in range(BASE_SLIMES + stage_no):
         pos = pop_spawn()
-        area = bounded_rect(pos, 160, 120)
-        slime = Slime(pos, area)
-        slime.actor.scale = HUGE_SCALE
-        enemies.append(slime)
-
+        enemy_specs.append((Slime, pos, bounded_rect(pos, 160, 120)))
     phantom_pos = pop_spawn()
-    phantom = Phantom(phantom_pos, bounded_rect(phantom_pos, 200, 160))
-    phantom.actor.scale = HUGE_SCALE
-    enemies.append(phantom)
-
-    if stage >= 2:
+    enemy_specs.append((Phantom, phantom_pos, bounded_rect(phantom_pos, 200, 160)))
+    if stage_no >= CHARGER_FROM_STAGE:
         charge_pos = pop_spawn()
-        charger = Charger(charge_pos, bounded_rect(charge_pos, 220, 160))
-        charger.actor.scale = HUGE_SCALE
-        enemies.append(charger)
-
-    random.shuffle(free_cells)
-    gem_positions = free_cells[:4] if len(free_cells) >= 4 else free_cells
-    gems = []
-    for pos in gem_positions:
-        g = Actor("gem", pos=pos)
-        g.scale = HUGE_SCALE
-        gems.append(g)
-
+        enemy_specs.append((Charger, charge_pos, bounded_rect(charge_pos, 220, 160)))
+
+    free_cells = nav.reachable_from(player_start)
+    rng.shuffle(free_cells)
+    turret_cells = nav.reachable_from((WIDTH / 2, HEIGHT / 2))
+    rng.shuffle(turret_cells)
+
+    spares = {}
+    spare_rng = random.Random(stage_no)
+    area = bounded_rect(player_start, 160, 120)
+    for kind, count in (spare_counts or {}).items():
+        needed = sum(1 for spec in enemy_specs if spec[0] is kind) - count
+        spares[kind] = [kind(player_start, area, spare_rng) for _ in range(needed)]
+
+    return {
+        "seed": seed,
+        "stage": stage_no,
+        "rng": rng,
+        "walls": walls,
+        "mask": mask,
+        "nav": nav,
+        "chase": nav_grid_for(walls, CHASE_STEP, CHASE_CLEARANCE, mask, CHASE_CLEARANCE),
+        "player": Player(player_start),
+        "enemies": enemy_specs,
+        "gems": free_cells[:4],
+        "turrets": [(pos, rng.random()) for pos in turret_cells[:3]],
+        "spikes": make_spikes(),
+        "spares": spares,
+    }
+
+
+def prepare_next_stage():
+    global stage_planner, next_stage
+    next_stage = None
+    if stage >= MAX_STAGE:
+        return
+    if not PREPARE_STAGES:
+        return
+    counts = {kind: len(pool.free) for kind, pool in enemy_pools.items()}
+    for enemy in enemies:
+        counts[type(enemy)] += 1
+    if stage_planner is None:
+        stage_planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stage")
+    next_stage = (game_seed, stage + 1, stage_planner.submit(plan_stage, game_seed, stage + 1, counts))
+
+
+def take_stage_plan(stage_no):
+    global next_stage
+    pending = next_stage
+    next_stage = None
+    if pending is not None and pending[:2] == (game_seed, stage_no):
+        return pending[2].result()
+    return plan_stage(game_seed, stage_no)
+
+
+def create_game_objects(plan):
+    global gems, walls, total_gems, exit_unlocked, spikes, turrets, hearts
+    global flow_field, wall_mask
+    recycle_stage()
+    for kind, spares in plan["spares"].items():
+        enemy_pools[kind].release_all(spares)
+    walls = plan["walls"]
+    wall_mask = plan["mask"]
+    los_cache.clear()
+    nav = plan["chase"]
+    if flow_field is None or flow_field.grid is not nav:
+        flow_field = FlowField(nav)
+    rng = plan["rng"]
+    enemies[:] = [enemy_pools[kind].acquire(pos, area, rng) for kind, pos, area in plan["enemies"]]
+    gems = [gem_pool.acquire(pos) for pos in plan["gems"]]
+    turrets = [turret_pool.acquire(pos, timer) for pos, timer in plan["turrets"]]
+
+    player_anim = plan["player"]
     total_gems = len(gems)
     player_anim.hp = PLAYER_HP
     player_anim.invulnerable = 0.0
     exit_unlocked = False
-    bullets = []
-    spikes = make_spikes()
-    turrets = make_turrets(walls)
-    turret_shots = []
+    bullets.clear()
+    spikes = plan["spikes"]
+    turret_shots.clear()
     hearts = []
+    index_pickups()
+    layer_cache.pop("stage", None)
     return player_anim
 
 
+def index_pickups():
+    gem_grid.clear()
+    heart_grid.clear()
+    spike_grid.clear()
+    for gem in gems:
+        gem_grid.insert(gem, actor_rect(gem))
+    for h in hearts:
+        heart_grid.insert(h, actor_rect(h))
+    for spike in spikes:
+        spike_grid.insert(spike, spike["rect"])
+
+
 def start_music():
     if music_on:
         try:
@@ -559,11 +1013,73 @@ def stop_music():
             pass
 
 
-def start_game():
+def seed_game(seed=None):
+    global game_seed, tick_accumulator, game_time
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    game_seed = seed
+    rng.seed(seed)
+    tick_accumulator = 0.0
+    game_time = 0.0
+    return seed
+
+
+def take_snapshot():
+    return snapshot.capture(sys.modules[__name__])
+
+
+def restore_snapshot(data):
+    was_playing = game_state == "playing"
+    snapshot.restore(sys.modules[__name__], data)
+    if recorder is None and game_state == "playing":
+        start_recording()
+    if recorder is not None:
+        recorder.restored(data)
+    if next_stage is None or next_stage[:2] != (game_seed, stage + 1):
+        prepare_next_stage()
+    if game_state == "playing" and not was_playing:
+        start_music()
+
+
+def start_recording():
+    global recorder
+    recorder = Recorder(game_seed, stage, TICK_RATE) if RECORD_DIR else None
+
+
+def finish_recording():
+    global recorder
+    if recorder is not None:
+        recorder.save(RECORD_DIR)
+        recorder = None
+
+
+def preload_assets():
+    global asset_loader
+    if asset_loader is None and PRELOAD_ASSETS:
+        asset_loader = AssetLoader(
+            {
+                "images": lambda name, path: images.load(name),
+                "sounds": lambda name, path: sounds.load(name),
+                "music": warm_file,
+            },
+            extra=[(f"atlas@{scale}", lambda scale=scale: sprite_atlas.build(scale)) for scale in (1.0, HUGE_SCALE)],
+        )
+        asset_loader.start()
+    return asset_loader
+
+
+def start_game(seed=None, first_stage=1):
     global player, game_state, stage
-    stage = 1
-    player = create_game_objects()
+    if preload_assets() is not None:
+        asset_loader.wait()
+    seed_game(seed)
+    stage = first_stage
+    player = create_game_objects(take_stage_plan(stage))
+    prepare_next_stage()
     game_state = "playing"
+    snapshots.clear()
+    snapshots.mark_stage(stage, take_snapshot())
+    start_recording()
     start_music()
 
 
@@ -571,6 +1087,8 @@ def toggle_sound():
     global sound_on, music_on
     sound_on = not sound_on
     music_on = sound_on
+    audio.enabled = sound_on
+    audio.clear()
     if music_on and game_state != "game_over":
         start_music()
     else:
@@ -591,69 +1109,125 @@ menu_buttons = [
 def reset_to_menu():
     global game_state
     game_state = "menu"
+    finish_recording()
     stop_music()
 
 
 def update(dt):
+    global tick_accumulator
+    step = 1 / TICK_RATE
+    tick_accumulator += dt
+    ticks = 0
+    while tick_accumulator >= step:
+        if ticks == MAX_TICKS_PER_FRAME:
+            tick_accumulator = 0.0
+            break
+        tick(step)
+        tick_accumulator -= step
+        ticks += 1
+    audio.flush()
+
+
+def tick(dt):
     global title_wave, game_state, game_time, exit_unlocked, bullets, spikes, turret_shots, hearts
     game_time += dt
+    los_cache.clear()
     if game_state == "menu":
         title_wave += dt
         update_fireflies(dt)
+        preload_assets()
         return
 
     if game_state != "playing":
         return
 
-    update_fireflies(dt)
-    update_spikes(dt)
-    update_turrets(dt)
-    player.update(dt, walls)
-    alive = []
-    for enemy in enemies:
-        enemy.update(dt)
-        if actor_rect(enemy.actor).colliderect(actor_rect(player.actor)):
+    if recorder is not None:
+        recorder.movement(keyboard)
+    with profiler.scope("update_fireflies"):
+        update_fireflies(dt)
+    with profiler.scope("update_spikes"):
+        update_spikes(dt)
+    with profiler.scope("update_turrets"):
+        update_turrets(dt)
+    with profiler.scope("player.update"):
+        player.update(dt, walls)
+    flow_field.update(player.actor.pos)
+
+    def settle(enemy, touching):
+        if touching:
             player.hit(ENEMY_TOUCH_DAMAGE)
             enemy.push_from_player(player.actor.pos, walls)
-        if enemy.hp > 0:
-            alive.append(enemy)
-        else:
-            if random.random() < 0.35:
-                hearts.append(make_heart(enemy.actor.pos))
-    enemies[:] = alive
-
-    bullets = update_player_shots(dt, enemies, walls, bullets)
-    turret_shots = update_turret_shots(dt, walls, turret_shots)
-
-    collect_gems()
+        if enemy.hp <= 0:
+            if rng.random() < 0.35:
+                h = make_heart(enemy.actor.pos)
+                hearts.append(h)
+                heart_grid.insert(h, actor_rect(h))
+            enemy_pools[type(enemy)].release(enemy)
+
+    with profiler.scope("update_enemies"):
+        update_enemies(dt, settle)
+    enemies[:] = [enemy for enemy in enemies if enemy.hp > 0]
+
+    with profiler.scope("update_player_shots"):
+        bullets = update_player_shots(dt, enemies, walls, bullets)
+    with profiler.scope("update_turret_shots"):
+        turret_shots = update_turret_shots(dt, walls, turret_shots)
+
+    with profiler.scope("collect_gems"):
+        collect_gems()
     exit_unlocked = len(gems) == 0
     check_victory()
     if player.hp <= 0:
         game_state = "game_over"
         stop_music()
+    if game_state == "playing" and snapshots.due():
+        snapshots.push(take_snapshot())
+    if recorder is not None:
+        recorder.advance()
+        if game_state != "playing":
+            finish_recording()
+
+
+def update_enemies(dt, settle=None):
+    mask = wall_mask_for(walls)
+    if enemies:
+        update_enemy_batch(list(enemies), dt, player.prev_pos, player.actor.pos, actor_box(player.actor), mask, settle)
 
 
 def collect_gems():
     global gems, hearts
-    remaining = []
-    player_rect = actor_rect(player.actor)
-    for gem in gems:
-        if player_rect.colliderect(actor_rect(gem)):
-            if sound_on:
-                sounds.collect.play()
-        else:
-            remaining.append(gem)
-    gems = remaining
-    for spike in spikes:
-        if spike["active"] and player_rect.colliderect(spike["rect"]):
+    taken = []
+    for gem, gem_rect in swept_by_player(gem_grid, actor_rect):
+        gem_grid.remove(gem, gem_rect)
+        gem_pool.release(gem)
+        taken.append(gem)
+        audio.post("collect")
+    if taken:
+        gems = [gem for gem in gems if all(gem is not t for t in taken)]
+    for spike, _ in swept_by_player(spike_grid, lambda spike: spike["rect"]):
+        if spike["active"]:
             player.hit(SPIKE_DAMAGE)
-    new_hearts = []
-    for h in hearts:
-        if player_rect.colliderect(actor_rect(h)):
-            player.hp = min(PLAYER_HP, player.hp + HEART_HEAL)
-            continue
-        new_hearts.append(h)
-    hearts = new_hearts
+    taken = []
+    for h, heart_rect in swept_by_player(heart_grid, actor_rect):
+        heart_grid.remove(h, heart_rect)
+        heart_pool.release(h)
+        taken.append(h)
+        player.hp = min(PLAYER_HP, player.hp + HEART_HEAL)
+    if taken:
+        hearts = [h for h in hearts if all(h is not t for t in taken)]
+
+
+def swept_by_player(grid, rect_of):
+    ax, ay = player.prev_pos
+    bx, by = player.actor.pos
+    half_w = player.actor.width / 2
+    half_h = player.actor.height / 2
+    found = []
+    for item in grid.query_box(min(ax, bx) - half_w, min(ay, by) - half_h, max(ax, bx) + half_w, max(ay, by) + half_h):
+        r = rect_of(item)
+        if path_touches(ax, ay, bx, by, r.left - half_w, r.top - half_h, r.right + half_w, r.bottom + half_h):
+            found.append((item, r))
+    return found
 
 
 def check_victory():
@@ -667,49 +1241,60 @@ def check_victory():
         if stage >= MAX_STAGE:
             game_state = "win"
             stop_music()
-            if sound_on:
-                sounds.hit.play()
+            audio.post("hit")
         else:
             stage += 1
             player_pos = (player.actor.x, player.actor.y)
             hp_keep = player.hp
-            player = create_game_objects()
+            player = create_game_objects(take_stage_plan(stage))
             player.actor.x, player.actor.y = player_pos
             player.hp = hp_keep
+            prepare_next_stage()
+            snapshots.mark_stage(stage, take_snapshot())
 
 
 def draw():
-    draw_background()
+    global last_drawn_state
     if game_state == "menu":
+        with profiler.scope("draw_background"):
+            draw_cached_layer("menu", draw_background)
         draw_menu()
     elif game_state == "playing":
-        draw_playfield()
+        with profiler.scope("draw_playfield"):
+            if DIRTY_RECTS:
+                draw_playfield_dirty()
+            else:
+                draw_playfield()
     elif game_state == "game_over":
         draw_playfield()
         draw_banner("You were defeated! Click to return to menu.", (255, 210, 210))
     elif game_state == "win":
         draw_playfield()
         draw_banner("You escaped with the relic! Click to return.", (210, 255, 210))
+    last_drawn_state = game_state
+    profiler.end_frame()
 
 
 def draw_menu():
     draw_fireflies()
     wave = math.sin(title_wave * 2) * 10
-    screen.draw.text(
+    draw_text(
         TITLE,
         center=(WIDTH // 2, 120 + wave),
         fontsize=70,
         color=(230, 240, 255),
     )
-    screen.draw.text(
+    draw_text(
         "Collect all relic shards and reach the exit.",
         center=(WIDTH // 2, 170),
         fontsize=28,
         color=(200, 220, 240),
     )
+    if asset_loader is not None and not asset_loader.ready:
+        draw_loading_bar(asset_loader.progress)
     for btn in menu_buttons:
         btn.draw()
-    screen.draw.text(
+    draw_text(
         "Controls: Arrow keys to move. Avoid enemies!",
         center=(WIDTH // 2, 420),
         fontsize=24,
@@ -717,28 +1302,53 @@ def draw_menu():
     )
 
 
+def draw_loading_bar(progress):
+    bar = Rect((WIDTH // 2 - 120, 206), (240, 8))
+    draw_text(
+        f"Loading assets {int(progress * 100)}%",
+        center=(WIDTH // 2, 196),
+        fontsize=20,
+        color=(170, 190, 210),
+    )
+    fill_rect(Rect((bar.x, bar.y), (bar.width * progress, bar.height)), (120, 180, 230))
+    outline_rect(bar, (210, 220, 240))
+
+
 def draw_playfield():
-    draw_floor_pattern()
-    draw_fireflies()
-    for wall in walls:
-        fill_rect(wall, (62, 92, 115))
-        outline_rect(wall, (30, 45, 60))
+    draw_cached_layer("stage", draw_static_layer)
+    draw_playfield_sprites()
 
+
+def draw_playfield_dirty():
+    global dirty_rects
+    layer = layer_cache.get("stage")
+    surface = getattr(screen, "surface", None)
+    if layer is None or surface is None or last_drawn_state != "playing":
+        draw_playfield()
+    else:
+        for r in dirty_rects:
+            surface.blit(layer, (r.x, r.y), tuple(r))
+        draw_playfield_sprites()
+    dirty_rects = playfield_dirty_rects()
+
+
+def draw_playfield_sprites():
+    draw_fireflies()
     draw_exit()
 
     for spike in spikes:
         img = "spike_on" if spike["active"] else "spike_off"
-        screen.blit(img, (spike["rect"].left, spike["rect"].top))
+        screen.blit(sprite_atlas.frame(img), (spike["rect"].left, spike["rect"].top))
 
     for turret in turrets:
-        turret["actor"].draw()
+        draw_sprite(turret["actor"])
     for gem in gems:
         pulse = 6 + math.sin(game_time * 3) * 2
         screen.draw.filled_circle(gem.pos, 12 + pulse, (50, 130, 200))
         screen.draw.circle(gem.pos, 16 + pulse, (160, 210, 255))
-        gem.draw()
+        draw_sprite(gem)
     for h in hearts:
-        h.draw()
+        draw_sprite(h)
     for enemy in enemies:
         enemy.draw()
     draw_player_with_aura()
@@ -755,18 +1365,64 @@ def on_mouse_down(pos):
     elif game_state in ("game_over", "win"):
         reset_to_menu()
     elif game_state == "playing":
-        shot = player.shoot(pos)
-        if shot:
-            bullets.append(shot)
+        if recorder is not None:
+            recorder.mouse_down(pos)
+        player.shoot(pos, bullets)
 
 
 def on_key_down(key):
+    if key in (keys.F5, keys.F6, keys.F9, keys.BACKSPACE):
+        snapshot_key(key)
+        return
+    if game_state == "playing" and recorder is not None:
+        recorder.key_down(key)
     if key == keys.ESCAPE:
         reset_to_menu()
+    if key == keys.F3:
+        toggle_profiler()
     if game_state == "playing" and key == keys.R:
         player.reload()
 
 
+def snapshot_key(key):
+    try:
+        quick_snapshot(key)
+    except (OSError, ValueError) as exc:
+        print(f"snapshot failed: {exc}")
+
+
+def quick_snapshot(key):
+    if key == keys.F9:
+        if os.path.exists(SAVE_PATH):
+            data = snapshot.load(SAVE_PATH)
+            if preload_assets() is not None:
+                asset_loader.wait()
+            restore_snapshot(data)
+            snapshots.clear()
+            snapshots.mark_stage(stage, take_snapshot())
+    elif game_state != "playing":
+        return
+    elif key == keys.F5:
+        snapshot.save(SAVE_PATH, take_snapshot())
+    elif key == keys.F6:
+        if stage in snapshots.stage_starts:
+            restore_snapshot(snapshots.stage_starts[stage])
+    elif key == keys.BACKSPACE:
+        data = snapshots.rewind()
+        if data is not None:
+            restore_snapshot(data)
+
+
+def toggle_profiler():
+    global screen
+    profiler.enabled = not profiler.enabled
+    profiler.reset()
+    if profiler.enabled:
+        screen = profiler.wrap_screen(screen)
+    else:
+        screen = screen.inner
+
+
 def draw_background():
     for i in range(16):
         t = i / 15
@@ -786,18 +1442,71 @@ def draw_floor_pattern():
         screen.draw.line((x, 0), (x, HEIGHT), (20, 40, 46))
 
 
+def screen_clip(r, pad=2):
+    left = max(0, int(r.x) - pad)
+    top = max(0, int(r.y) - pad)
+    right = min(WIDTH, int(math.ceil(r.x + r.width)) + pad)
+    bottom = min(HEIGHT, int(math.ceil(r.y + r.height)) + pad)
+    if right <= left or bottom <= top:
+        return None
+    return Rect((left, top), (right - left, bottom - top))
+
+
+def circle_bounds(pos, radius):
+    return Rect((pos[0] - radius, pos[1] - radius), (radius * 2, radius * 2))
+
+
+def playfield_dirty_rects():
+    found = list(HUD_AREAS)
+    if profiler.enabled:
+        found.append(PROFILER_AREA)
+    for x, y in zip(fireflies.x.tolist(), fireflies.y.tolist()):
+        found.append(circle_bounds((x, y), 8))
+    found.append(exit_rect.inflate(24, 24))
+    for spike in spikes:
+        found.append(spike["rect"])
+    for turret in turrets:
+        found.append(actor_rect(turret["actor"]))
+    for gem in gems:
+        found.append(circle_bounds(gem.pos, 25))
+    for h in hearts:
+        found.append(actor_rect(h))
+    for enemy in enemies:
+        found.append(actor_rect(enemy.actor))
+    reach = player.actor.width + 24
+    found.append(circle_bounds(player.actor.pos, reach))
+    for shots, ring in ((bullets, 2), (turret_shots, 1)):
+        n = shots.count
+        for x, y, radius in zip(shots.x[:n].tolist(), shots.y[:n].tolist(), shots.radius[:n].tolist()):
+            found.append(circle_bounds((x, y), radius + ring))
+    clipped = []
+    for r in found:
+        r = screen_clip(r)
+        if r is not None:
+            clipped.append(r)
+    return clipped
+
+
+def draw_static_layer():
+    draw_floor_pattern()
+    for wall in walls:
+        fill_rect(wall, (62, 92, 115))
+        outline_rect(wall, (30, 45, 60))
+
+
+def draw_cached_layer(key, painter):
+    layer = layer_cache.get(key)
+    if layer is not None:
+        screen.blit(layer, (0, 0))
+        return
+    painter()
+    surface = getattr(screen, "surface", None)
+    if surface is not None:
+        layer_cache[key] = surface.copy()
+
+
 def update_fireflies(dt):
-    for bug in fireflies:
-        bug["y"] += math.sin(game_time * 2 + bug["phase"]) * bug["speed"] * dt
-        bug["x"] += math.cos(game_time * 1.5 + bug["phase"]) * bug["speed"] * 0.6 * dt
-        if bug["x"] < 0:
-            bug["x"] += WIDTH
-        if bug["x"] > WIDTH:
-            bug["x"] -= WIDTH
-        if bug["y"] < 0:
-            bug["y"] += HEIGHT
-        if bug["y"] > HEIGHT:
-            bug["y"] -= HEIGHT
+    fireflies.update(game_time, dt)
 
 
 def update_spikes(dt):
@@ -821,25 +1530,19 @@ def update_turrets(dt):
                     dist = 1
                 dx /= dist
                 dy /= dist
-                turret_shots.append(
-                    {
-                        "x": turret["actor"].x,
-                        "y": turret["actor"].y,
-                        "dx": dx,
-                        "dy": dy,
-                        "speed": TURRET_BULLET_SPEED,
-                        "ttl": 3.0,
-                        "radius": 4,
-                        "damage": TURRET_DAMAGE,
-                    }
+                turret_shots.spawn(
+                    turret["actor"].x, turret["actor"].y, dx, dy, TURRET_BULLET_SPEED, 3.0, 4, TURRET_DAMAGE
                 )
 
 
 def draw_fireflies():
-    for bug in fireflies:
-        pulse = 1.5 + math.sin(game_time * 6 + bug["phase"]) * 0.8
-        screen.draw.filled_circle((bug["x"], bug["y"]), 2 + pulse, (230, 255, 200))
-        screen.draw.circle((bug["x"], bug["y"]), 4 + pulse, (80, 140, 90))
+    batch = fireflies.sprites(game_time)
+    surface = getattr(screen, "surface", None)
+    if surface is not None and hasattr(surface, "blits"):
+        surface.blits([(sprite_atlas.frame(name), pos) for name, pos in batch], False)
+        return
+    for name, pos in batch:
+        screen.blit(name, pos)
 
 
 def draw_player_with_aura():
@@ -869,31 +1572,62 @@ def draw_player_with_aura():
 
 
 def draw_hud():
-    screen.draw.text(f"HP: {player.hp}", topleft=(20, 18), fontsize=26, color=(235, 245, 255))
-    screen.draw.text(
+    draw_text(f"HP: {player.hp}", topleft=(20, 18), fontsize=26, color=(235, 245, 255))
+    draw_text(
         f"Gems: {total_gems - len(gems)}/{total_gems}",
         topleft=(20, 46),
         fontsize=24,
         color=(200, 230, 255),
     )
-    screen.draw.text(f"{player.ammo}/{player.reserve}", topleft=(WIDTH - 140, HEIGHT - 50), fontsize=20, color=(235, 245, 255))
+    draw_text(f"{player.ammo}/{player.reserve}", topleft=(WIDTH - 140, HEIGHT - 50), fontsize=20, color=(235, 245, 255))
     if player.reloading:
-        screen.draw.text("Reloading", topleft=(WIDTH - 140, HEIGHT - 30), fontsize=18, color=(240, 200, 120))
+        draw_text("Reloading", topleft=(WIDTH - 140, HEIGHT - 30), fontsize=18, color=(240, 200, 120))
     else:
-        screen.draw.text("R reload", topleft=(WIDTH - 140, HEIGHT - 30), fontsize=16, color=(200, 220, 230))
+        draw_text("R reload", topleft=(WIDTH - 140, HEIGHT - 30), fontsize=16, color=(200, 220, 230))
     msg = "Exit unlocked! Reach the door." if exit_unlocked else "Clear room and grab all gems."
-    screen.draw.text(msg, topright=(WIDTH - 14, 16), fontsize=22, color=(210, 230, 240))
+    draw_text(msg, topright=(WIDTH - 14, 16), fontsize=22, color=(210, 230, 240))
     danger = "Spikes toggling + turrets firing" if spikes else ""
     if danger:
-        screen.draw.text(danger, topright=(WIDTH - 14, 42), fontsize=18, color=(240, 180, 150))
-    screen.draw.text(f"Stage {stage}/{MAX_STAGE}", topleft=(WIDTH//2 - 40, 14), fontsize=22, color=(230, 230, 255))
+        draw_text(danger, topright=(WIDTH - 14, 42), fontsize=18, color=(240, 180, 150))
+    draw_text(f"Stage {stage}/{MAX_STAGE}", topleft=(WIDTH//2 - 40, 14), fontsize=22, color=(230, 230, 255))
+    if profiler.enabled:
+        draw_profiler_overlay()
+
+
+def draw_profiler_overlay():
+    y = PROFILER_AREA.top + 4
+    screen.draw.text("avg / worst over last frames (F3 hides)", topleft=(12, y), fontsize=16, color=(240, 220, 160))
+    stats = text_cache.stats()
+    y += 15
+    screen.draw.text(
+        f"text cache {stats['hit_rate']:4.0%} hit  {stats['entries']} surfaces  {stats['bytes'] // 1024}/{stats['budget'] // 1024} KB",
+        topleft=(12, y),
+        fontsize=16,
+        color=(240, 220, 160),
+    )
+    for name, avg, worst in profiler.rows():
+        y += 15
+        if name == "draw calls":
+            line = f"{name:20} {avg:7.0f} {worst:7.0f}"
+        else:
+            line = f"{name:20} {avg * 1000:6.2f}ms {worst * 1000:6.2f}ms"
+        screen.draw.text(line, topleft=(12, y), fontsize=16, color=(220, 235, 245))
+
+
+def draw_text(text, fontsize, color, **anchor):
+    if not text_cache.ready:
+        screen.draw.text(text, fontsize=fontsize, color=color, **anchor)
+        return
+    ((name, pos),) = anchor.items()
+    surf = text_cache.get(text, fontsize, color)
+    screen.blit(surf, text_cache.place(surf, name, pos))
 
 
 def draw_banner(text, color):
     cover = Rect((40, HEIGHT // 2 - 50), (WIDTH - 80, 100))
     fill_rect(cover, (12, 16, 18))
     outline_rect(cover, (230, 230, 230))
-    screen.draw.text(text, center=(cover.centerx, cover.centery), fontsize=30, color=color)
+    draw_text(text, center=(cover.centerx, cover.centery), fontsize=30, color=color)
 
 
 def draw_exit():
@@ -906,101 +1640,100 @@ def draw_exit():
         fill_rect(exit_rect.inflate(glow * 1.2, glow * 1.2), (24, 24, 18))
     else:
         outline_rect(exit_rect.inflate(6, 6), (30, 20, 10))
-    screen.blit(img, pos)
+    screen.blit(sprite_atlas.frame(img), pos)
 
 
 def draw_bullets():
-    for b in bullets:
-        screen.draw.filled_circle((b["x"], b["y"]), b["radius"], (230, 250, 255))
-        screen.draw.circle((b["x"], b["y"]), b["radius"] + 2, (120, 180, 210))
-    for s in turret_shots:
-        screen.draw.filled_circle((s["x"], s["y"]), s["radius"], (240, 120, 90))
-        screen.draw.circle((s["x"], s["y"]), s["radius"] + 1, (180, 70, 50))
+    for shots, ring, fill, edge in (
+        (bullets, 2, (230, 250, 255), (120, 180, 210)),
+        (turret_shots, 1, (240, 120, 90), (180, 70, 50)),
+    ):
+        n = shots.count
+        for x, y, radius in zip(shots.x[:n].tolist(), shots.y[:n].tolist(), shots.radius[:n].tolist()):
+            screen.draw.filled_circle((x, y), radius, fill)
+            screen.draw.circle((x, y), radius + ring, edge)
 
 
-fireflies = make_fireflies()
+fireflies = make_fireflies(rng)
 
 
 def make_heart(pos):
-    h = Actor("heart", pos=pos)
-    h.scale = HUGE_SCALE
-    return h
+    return heart_pool.acquire(pos)
 
 
 def update_player_shots(dt, enemies, walls, shots):
-    updated = []
-    for b in shots:
-        b["ttl"] -= dt
-        if b["ttl"] <= 0:
-            continue
-        b["x"] += b["dx"] * b["speed"] * dt
-        b["y"] += b["dy"] * b["speed"] * dt
-        if b["x"] < 0 or b["x"] > WIDTH or b["y"] < 0 or b["y"] > HEIGHT:
-            continue
-        if any(Rect(w).collidepoint(b["x"], b["y"]) for w in walls):
-            continue
-        hit_enemy = False
+    if not shots.count:
+        return shots
+    mask = wall_mask_for(walls)
+    ax, ay, x, y, alive = shots.integrate(dt)
+    wall_t = mask.rects.sweep_many(ax, ay, x, y)
+    keep = alive & (wall_t == np.inf) & (x >= 0) & (x <= WIDTH) & (y >= 0) & (y <= HEIGHT)
+    if enemies:
+        grid = SpatialHash(GRID_CELL)
+        boxes = []
         for enemy in enemies:
-            if actor_rect(enemy.actor).collidepoint(b["x"], b["y"]):
-                enemy.take_damage(BULLET_DAMAGE)
-                hit_enemy = True
-                break
-        if not hit_enemy:
-            updated.append(b)
-    return updated
+            r = actor_rect(enemy.actor)
+            grid.insert(enemy, r)
+            boxes.append((r.left, r.top, r.right, r.bottom))
+        near = np.flatnonzero(alive & near_cells(grid, ax, ay, x, y))
+        if near.size:
+            sx = ax[near]
+            sy = ay[near]
+            entries = segment_entries(sx, sy, x[near] - sx, y[near] - sy, np.array(boxes, dtype=np.float64).T)
+            first = entries.argmin(axis=1)
+            hits = entries[np.arange(near.size), first] < np.minimum(wall_t[near], 2.0)
+            damage = shots.damage
+            for i, k in zip(near[hits].tolist(), first[hits].tolist()):
+                enemies[k].take_damage(int(damage[i]))
+                keep[i] = False
+    shots.compact(keep)
+    return shots
+
+
+def near_cells(grid, ax, ay, bx, by):
+    size = grid.cell_size
+    cols = WIDTH // size + 3
+    rows = HEIGHT // size + 3
+    occupied = np.zeros((cols, rows), dtype=bool)
+    for cx, cy in grid.cells:
+        if -1 <= cx < cols - 1 and -1 <= cy < rows - 1:
+            occupied[cx + 1, cy + 1] = True
+    x0 = np.clip(np.floor_divide(np.minimum(ax, bx), size), -1, cols - 2).astype(np.intp) + 1
+    x1 = np.clip(np.floor_divide(np.maximum(ax, bx), size), -1, cols - 2).astype(np.intp) + 1
+    y0 = np.clip(np.floor_divide(np.minimum(ay, by), size), -1, rows - 2).astype(np.intp) + 1
+    y1 = np.clip(np.floor_divide(np.maximum(ay, by), size), -1, rows - 2).astype(np.intp) + 1
+    near = occupied[x0, y0] | occupied[x1, y0] | occupied[x0, y1] | occupied[x1, y1]
+    return near | (x1 - x0 > 1) | (y1 - y0 > 1)
 
 
 def update_turret_shots(dt, walls, shots):
-    updated = []
-    for s in shots:
-        s["ttl"] -= dt
-        if s["ttl"] <= 0:
-            continue
-        s["x"] += s["dx"] * s["speed"] * dt
-        s["y"] += s["dy"] * s["speed"] * dt
-        if s["x"] < 0 or s["x"] > WIDTH or s["y"] < 0 or s["y"] > HEIGHT:
-            continue
-        if any(Rect(w).collidepoint(s["x"], s["y"]) for w in walls):
-            continue
-        if actor_rect(player.actor).collidepoint(s["x"], s["y"]):
-            player.hit(s.get("damage", TURRET_DAMAGE))
-            continue
-        updated.append(s)
-    return updated
-
-
-def has_line_of_sight(a, b, walls, steps=10):
-    ax, ay = a
-    bx, by = b
-    for i in range(1, steps):
-        t = i / steps
-        x = ax + (bx - ax) * t
-        y = ay + (by - ay) * t
-        if any(Rect(w).collidepoint(x, y) for w in walls):
-            return False
-    return True
+    if not shots.count:
+        return shots
+    mask = wall_mask_for(walls)
+    ax, ay, x, y, alive = shots.integrate(dt)
+    wall_t = mask.rects.sweep_many(ax, ay, x, y)
+    r = actor_rect(player.actor)
+    body = np.array([[r.left], [r.top], [r.right], [r.bottom]], dtype=np.float64)
+    hit = alive & (segment_entry_many(ax, ay, x - ax, y - ay, body) < wall_t)
+    for i in np.flatnonzero(hit).tolist():
+        player.hit(int(shots.damage[i]))
+    keep = alive & ~hit & (wall_t == np.inf) & (x >= 0) & (x <= WIDTH) & (y >= 0) & (y <= HEIGHT)
+    shots.compact(keep)
+    return shots
+
+
+def has_line_of_sight(a, b, walls):
+    mask = wall_mask_for(walls)
+    key = (int(a[0]), int(a[1]), int(b[0]), int(b[1]))
+    seen = los_cache.get(key)
+    if seen is None:
+        seen = not mask.rects.segment_blocked(a[0], a[1], b[0], b[1])
+        los_cache[key] = seen
+    return seen
 
 
 def reachable_positions(start, walls, step=24, margin=18):
-    start_cell = (int(start[0] // step), int(start[1] // step))
-    visited = {start_cell}
-    queue = [start_cell]
-    results = []
-    idx = 0
-    while idx < len(queue):
-        cx, cy = queue[idx]
-        idx += 1
-        x = cx * step + step / 2
-        y = cy * step + step / 2
-        if margin <= x <= WIDTH - margin and margin <= y <= HEIGHT - margin:
-            if not any(Rect(w).collidepoint(x, y) for w in walls):
-                results.append((x, y))
-                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-                    nxt = (cx + dx, cy + dy)
-                    if nxt not in visited:
-                        visited.add(nxt)
-                        queue.append(nxt)
-    return results
+    return nav_grid_for(walls, step, margin).reachable_from(start)
 
 
 def bounded_rect(center, w, h):
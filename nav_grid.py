@@ -0,0 +1,171 @@
+import math
+
+NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONALS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class NavGrid:
+    def __init__(self, mask, width, height, step=24, margin=18, clearance=0):
+        self.step = step
+        self.margin = margin
+        self.clearance = clearance
+        self.cols = int(width // step) + 1
+        self.rows = int(height // step) + 1
+        self.walkable = set()
+        for cx in range(self.cols):
+            x = cx * step + step / 2
+            if not margin <= x <= width - margin:
+                continue
+            for cy in range(self.rows):
+                y = cy * step + step / 2
+                if margin <= y <= height - margin and not mask.blocked(x, y) and self.clear(mask, x, y, x, y):
+                    self.walkable.add((cx, cy))
+        self.links = {}
+        self.corners = {}
+        for cell in self.walkable:
+            self.links[cell] = [
+                (cell[0] + dx, cell[1] + dy)
+                for dx, dy in NEIGHBORS
+                if (cell[0] + dx, cell[1] + dy) in self.walkable and self.passable(mask, cell, (cell[0] + dx, cell[1] + dy))
+            ]
+        for cell, links in self.links.items():
+            self.corners[cell] = [
+                (cell[0] + dx, cell[1] + dy)
+                for dx, dy in DIAGONALS
+                if (cell[0] + dx, cell[1]) in links
+                and (cell[0], cell[1] + dy) in links
+                and self.passable(mask, cell, (cell[0] + dx, cell[1] + dy))
+            ]
+        self.components = {}
+        label = 0
+        for cell in sorted(self.walkable):
+            if cell not in self.components:
+                for found in self.flood(cell):
+                    self.components[found] = label
+                label += 1
+        self.reachable = {}
+        self.spawns = {}
+
+    def clear(self, mask, ax, ay, bx, by):
+        c = self.clearance
+        if not c:
+            return True
+        left, right = min(ax, bx) - c, max(ax, bx) + c
+        top, bottom = min(ay, by) - c, max(ay, by) + c
+        return not mask.rects.colliderect((left, top, right - left, bottom - top))
+
+    def passable(self, mask, a, b):
+        ax, ay = self.center_of(a)
+        bx, by = self.center_of(b)
+        return not mask.rects.segment_blocked(ax, ay, bx, by) and self.clear(mask, ax, ay, bx, by)
+
+    def cell_of(self, pos):
+        return (int(pos[0] // self.step), int(pos[1] // self.step))
+
+    def center_of(self, cell):
+        return (cell[0] * self.step + self.step / 2, cell[1] * self.step + self.step / 2)
+
+    def flood(self, start_cell):
+        if start_cell not in self.walkable:
+            return []
+        visited = {start_cell}
+        queue = [start_cell]
+        idx = 0
+        links = self.links
+        while idx < len(queue):
+            cell = queue[idx]
+            idx += 1
+            for nxt in links[cell]:
+                if nxt not in visited:
+                    visited.add(nxt)
+                    queue.append(nxt)
+        return queue
+
+    def connected(self, a, b):
+        label = self.components.get(self.cell_of(a))
+        return label is not None and label == self.components.get(self.cell_of(b))
+
+    def reachable_from(self, start):
+        cell = self.cell_of(start)
+        cells = self.reachable.get(cell)
+        if cells is None:
+            cells = [self.center_of(c) for c in self.flood(cell)]
+            self.reachable[cell] = cells
+        return list(cells)
+
+    def spawn_cells(self, start, min_dist):
+        key = (start, min_dist)
+        cells = self.spawns.get(key)
+        if cells is None:
+            cells = [
+                pos for pos in self.reachable_from(start)
+                if math.hypot(pos[0] - start[0], pos[1] - start[1]) >= min_dist
+            ]
+            self.spawns[key] = cells
+        return list(cells)
+
+
+class FlowField:
+    def __init__(self, grid):
+        self.grid = grid
+        self.target = None
+        self.distance = {}
+        self.waypoints = {}
+
+    def update(self, pos):
+        cell = self.grid.cell_of(pos)
+        if cell == self.target:
+            return False
+        self.target = cell
+        links = self.grid.links
+        corners = self.grid.corners
+        if cell in links:
+            distance = {cell: 0}
+        else:
+            distance = {(cell[0] + dx, cell[1] + dy): 1 for dx, dy in NEIGHBORS if (cell[0] + dx, cell[1] + dy) in links}
+        queue = list(distance)
+        idx = 0
+        while idx < len(queue):
+            cur = queue[idx]
+            idx += 1
+            for nxt in links[cur]:
+                if nxt not in distance:
+                    distance[nxt] = distance[cur] + 1
+                    queue.append(nxt)
+        waypoints = {}
+        for cur, dist in distance.items():
+            best = None
+            best_dist = dist
+            for nxt in links[cur] + corners[cur]:
+                if distance.get(nxt, best_dist) < best_dist:
+                    best = nxt
+                    best_dist = distance[nxt]
+            if best is not None:
+                waypoints[cur] = self.grid.center_of(best)
+        self.distance = distance
+        self.waypoints = waypoints
+        return True
+
+    def nearest_entry(self, cell):
+        cx, cy = cell
+        best = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                dist = self.distance.get((cx + dx, cy + dy))
+                if dist is not None and (best is None or dist < best[0]):
+                    best = (dist, (cx + dx, cy + dy))
+        return self.grid.center_of(best[1]) if best else None
+
+    def step_from(self, pos):
+        cell = self.grid.cell_of(pos)
+        waypoint = self.waypoints.get(cell)
+        if waypoint is None and cell not in self.distance:
+            waypoint = self.nearest_entry(cell)
+        if waypoint is None:
+            return None
+        dx = waypoint[0] - pos[0]
+        dy = waypoint[1] - pos[1]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return None
+        return (dx / length, dy / length)
@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+
+GLOW_FRAMES = ["firefly_0", "firefly_1", "firefly_2", "firefly_3"]
+GLOW_HALF = 7
+
+
+class FireflySwarm:
+    def __init__(self, count, width, height, rng):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.x = np.array([rng.uniform(0, width) for _ in range(count)], dtype=np.float64)
+        self.y = np.array([rng.uniform(0, height) for _ in range(count)], dtype=np.float64)
+        self.speed = np.array([rng.uniform(8, 18) for _ in range(count)], dtype=np.float64)
+        self.phase = np.array([rng.random() * math.pi * 2 for _ in range(count)], dtype=np.float64)
+
+    def __len__(self):
+        return self.count
+
+    def update(self, time, dt):
+        step = self.speed * dt
+        self.x = (self.x + np.cos(time * 1.5 + self.phase) * step * 0.6) % self.width
+        self.y = (self.y + np.sin(time * 2 + self.phase) * step) % self.height
+
+    def levels(self, time):
+        levels = len(GLOW_FRAMES)
+        level = ((np.sin(time * 6 + self.phase) + 1) * 0.5 * levels).astype(np.intp)
+        return np.minimum(level, levels - 1)
+
+    def sprites(self, time):
+        return list(
+            zip(
+                [GLOW_FRAMES[level] for level in self.levels(time).tolist()],
+                zip((self.x - GLOW_HALF).tolist(), (self.y - GLOW_HALF).tolist()),
+            )
+        )
@@ -0,0 +1,18 @@
+class Pool:
+    def __init__(self, create, reset):
+        self.create = create
+        self.reset = reset
+        self.free = []
+
+    def acquire(self, *args):
+        if self.free:
+            item = self.free.pop()
+            self.reset(item, *args)
+            return item
+        return self.create(*args)
+
+    def release(self, item):
+        self.free.append(item)
+
+    def release_all(self, items):
+        self.free.extend(items)
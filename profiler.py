@@ -0,0 +1,124 @@
+import time
+from collections import deque
+
+
+class NullScope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = NullScope()
+
+
+class Scope:
+    __slots__ = ("totals", "name", "start")
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.totals[self.name] = self.totals.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class CountingDraw:
+    def __init__(self, draw, profiler):
+        self.inner = draw
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        target = getattr(self.inner, name)
+        profiler = self.profiler
+
+        def counted(*args, **kwargs):
+            profiler.draw_calls += 1
+            return target(*args, **kwargs)
+
+        return counted
+
+
+class CountingSurface:
+    def __init__(self, surface, profiler):
+        self.inner = surface
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        self.profiler.draw_calls += 1
+        return self.inner.blit(source, dest, area, special_flags)
+
+    def blits(self, blit_sequence, doreturn=True):
+        blit_sequence = list(blit_sequence)
+        self.profiler.draw_calls += len(blit_sequence)
+        return self.inner.blits(blit_sequence, doreturn)
+
+
+class CountingScreen:
+    def __init__(self, screen, profiler):
+        self.inner = screen
+        self.profiler = profiler
+        self.draw = CountingDraw(screen.draw, profiler)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    @property
+    def surface(self):
+        surface = getattr(self.inner, "surface", None)
+        if surface is None:
+            return None
+        return CountingSurface(surface, self.profiler)
+
+    def blit(self, image, pos):
+        self.profiler.draw_calls += 1
+        return self.inner.blit(image, pos)
+
+
+class FrameProfiler:
+    def __init__(self, window=120):
+        self.enabled = False
+        self.window = window
+        self.current = {}
+        self.history = {}
+        self.draw_calls = 0
+
+    def scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        return Scope(self.current, name)
+
+    def wrap_screen(self, screen):
+        return CountingScreen(screen, self)
+
+    def reset(self):
+        self.current.clear()
+        self.history.clear()
+        self.draw_calls = 0
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.current["draw calls"] = self.draw_calls
+        for name, value in self.current.items():
+            samples = self.history.get(name)
+            if samples is None:
+                samples = self.history[name] = deque(maxlen=self.window)
+            samples.append(value)
+        self.current.clear()
+        self.draw_calls = 0
+
+    def rows(self):
+        found = []
+        for name, samples in self.history.items():
+            found.append((name, sum(samples) / len(samples), max(samples)))
+        return found
@@ -0,0 +1,73 @@
+import numpy as np
+
+FLOAT_COLUMNS = ("x", "y", "dx", "dy", "speed", "ttl")
+INT_COLUMNS = ("radius", "damage")
+
+
+class ProjectilePool:
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.count = 0
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=np.float64))
+        for name in INT_COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        self.grow(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self, capacity):
+        if capacity <= self.capacity:
+            return
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            old = getattr(self, name)
+            column = np.zeros(capacity, dtype=old.dtype)
+            column[: self.capacity] = old
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def spawn(self, x, y, dx, dy, speed, ttl, radius, damage):
+        if self.count == self.capacity:
+            self.grow(max(16, self.capacity * 2))
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.dx[i] = dx
+        self.dy[i] = dy
+        self.speed[i] = speed
+        self.ttl[i] = ttl
+        self.radius[i] = radius
+        self.damage[i] = damage
+        self.count += 1
+        return i
+
+    def kill(self, i):
+        last = self.count - 1
+        if i != last:
+            for name in FLOAT_COLUMNS + INT_COLUMNS:
+                column = getattr(self, name)
+                column[i] = column[last]
+        self.count = last
+
+    def compact(self, keep):
+        n = self.count
+        kept = int(np.count_nonzero(keep))
+        if kept == n:
+            return
+        for name in FLOAT_COLUMNS + INT_COLUMNS:
+            column = getattr(self, name)
+            column[:kept] = column[:n][keep]
+        self.count = kept
+
+    def integrate(self, dt):
+        n = self.count
+        ax = self.x[:n].copy()
+        ay = self.y[:n].copy()
+        self.ttl[:n] -= dt
+        self.x[:n] += self.dx[:n] * self.speed[:n] * dt
+        self.y[:n] += self.dy[:n] * self.speed[:n] * dt
+        return ax, ay, self.x[:n], self.y[:n], self.ttl[:n] > 0
+
+    def clear(self):
+        self.count = 0
@@ -1,79 +1,330 @@
+import numpy as np
+
+
 class Rect:
+    __slots__ = ("_x", "_y", "_w", "_h", "_r", "_b")
+
     def __init__(self, pos, size=None):
         if size is None:
             if isinstance(pos, Rect):
-                self.x = pos.x
-                self.y = pos.y
-                self.width = pos.width
-                self.height = pos.height
+                x, y, w, h = pos._x, pos._y, pos._w, pos._h
             elif hasattr(pos, "__len__") and len(pos) == 4:
-                self.x, self.y, self.width, self.height = pos
+                x, y, w, h = pos
             else:
                 raise ValueError("Rect expects (x, y, w, h) or Rect")
         else:
-            self.x, self.y = pos
-            self.width, self.height = size
+            x, y = pos
+            w, h = size
+        self._x = x
+        self._y = y
+        self._w = w
+        self._h = h
+        self._r = x + w
+        self._b = y + h
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value
+        self._r = value + self._w
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = value
+        self._b = value + self._h
+
+    @property
+    def width(self):
+        return self._w
+
+    @width.setter
+    def width(self, value):
+        self._w = value
+        self._r = self._x + value
+
+    @property
+    def height(self):
+        return self._h
+
+    @height.setter
+    def height(self, value):
+        self._h = value
+        self._b = self._y + value
 
     @property
     def left(self):
-        return self.x
+        return self._x
 
     @property
     def right(self):
-        return self.x + self.width
+        return self._r
 
     @property
     def top(self):
-        return self.y
+        return self._y
 
     @property
     def bottom(self):
-        return self.y + self.height
+        return self._b
 
     @property
     def centerx(self):
-        return self.x + self.width / 2
+        return self._x + self._w / 2
 
     @property
     def centery(self):
-        return self.y + self.height / 2
+        return self._y + self._h / 2
 
     @property
     def center(self):
-        return (self.centerx, self.centery)
+        return (self._x + self._w / 2, self._y + self._h / 2)
 
     def collidepoint(self, x, y=None):
         if y is None:
             x, y = x
-        return self.left <= x <= self.right and self.top <= y <= self.bottom
+        return self._x <= x <= self._r and self._y <= y <= self._b
 
     def colliderect(self, other):
-        other = Rect(other) if not isinstance(other, Rect) else other
-        return not (
-            self.right < other.left
-            or self.left > other.right
-            or self.bottom < other.top
-            or self.top > other.bottom
-        )
+        if isinstance(other, Rect):
+            left, top, right, bottom = other._x, other._y, other._r, other._b
+        elif hasattr(other, "__len__") and len(other) == 4:
+            left, top, w, h = other
+            right = left + w
+            bottom = top + h
+        else:
+            raise ValueError("Rect expects (x, y, w, h) or Rect")
+        return not (self._r < left or self._x > right or self._b < top or self._y > bottom)
 
     def inflate(self, dx, dy):
-        new_w = self.width + dx
-        new_h = self.height + dy
-        cx = self.centerx
-        cy = self.centery
+        new_w = self._w + dx
+        new_h = self._h + dy
+        cx = self._x + self._w / 2
+        cy = self._y + self._h / 2
         return Rect((cx - new_w / 2, cy - new_h / 2), (new_w, new_h))
 
     def __iter__(self):
-        yield int(self.x)
-        yield int(self.y)
-        yield int(self.width)
-        yield int(self.height)
+        yield int(self._x)
+        yield int(self._y)
+        yield int(self._w)
+        yield int(self._h)
 
     def __len__(self):
         return 4
 
     def __getitem__(self, idx):
-        return (int(self.x), int(self.y), int(self.width), int(self.height))[idx]
+        return (int(self._x), int(self._y), int(self._w), int(self._h))[idx]
 
     def __repr__(self):
-        return f"Rect({self.x}, {self.y}, {self.width}, {self.height})"
+        return f"Rect({self._x}, {self._y}, {self._w}, {self._h})"
+
+
+class RectBatch:
+    __slots__ = ("rects", "edges", "columns")
+
+    def __init__(self, rects):
+        self.rects = [r if isinstance(r, Rect) else Rect(r) for r in rects]
+        self.edges = [(r._x, r._y, r._r, r._b) for r in self.rects]
+        self.columns = np.array(self.edges, dtype=np.float64).reshape(-1, 4).T
+
+    def __len__(self):
+        return len(self.rects)
+
+    def collidepoint(self, x, y=None):
+        if y is None:
+            x, y = x
+        return [
+            i
+            for i, (left, top, right, bottom) in enumerate(self.edges)
+            if left <= x <= right and top <= y <= bottom
+        ]
+
+    def colliderect(self, rect):
+        if not isinstance(rect, Rect):
+            rect = Rect(rect)
+        x0, y0, x1, y1 = rect._x, rect._y, rect._r, rect._b
+        return [
+            i
+            for i, (left, top, right, bottom) in enumerate(self.edges)
+            if not (x1 < left or x0 > right or y1 < top or y0 > bottom)
+        ]
+
+    def raycast(self, ax, ay, bx, by):
+        dx = bx - ax
+        dy = by - ay
+        best = None
+        for i, (left, top, right, bottom) in enumerate(self.edges):
+            t = segment_entry(ax, ay, dx, dy, left, top, right, bottom)
+            if t is not None and (best is None or t < best[0]):
+                best = (t, i)
+        return best
+
+    def sweep_many(self, ax, ay, bx, by):
+        return segment_entry_many(ax, ay, bx - ax, by - ay, self.columns)
+
+    def segment_blocked(self, ax, ay, bx, by):
+        dx = bx - ax
+        dy = by - ay
+        for left, top, right, bottom in self.edges:
+            if segment_entry(ax, ay, dx, dy, left, top, right, bottom) is not None:
+                return True
+        return False
+
+
+def segment_entry(ax, ay, dx, dy, left, top, right, bottom):
+    t0 = 0.0
+    t1 = 1.0
+    if dx == 0:
+        if ax < left or ax > right:
+            return None
+    else:
+        ta = (left - ax) / dx
+        tb = (right - ax) / dx
+        if ta > tb:
+            ta, tb = tb, ta
+        t0 = max(t0, ta)
+        t1 = min(t1, tb)
+        if t0 > t1:
+            return None
+    if dy == 0:
+        if ay < top or ay > bottom:
+            return None
+    else:
+        ta = (top - ay) / dy
+        tb = (bottom - ay) / dy
+        if ta > tb:
+            ta, tb = tb, ta
+        t0 = max(t0, ta)
+        t1 = min(t1, tb)
+        if t0 > t1:
+            return None
+    return t0
+
+
+def slab_many(a, d, lo, hi):
+    a = a[:, None]
+    d = d[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ta = (lo - a) / d
+        tb = (hi - a) / d
+    near = np.minimum(ta, tb)
+    far = np.maximum(ta, tb)
+    flat = d == 0
+    if flat.any():
+        outside = (a < lo) | (a > hi)
+        near = np.where(flat, np.where(outside, np.inf, -np.inf), near)
+        far = np.where(flat, np.where(outside, -np.inf, np.inf), far)
+    return near, far
+
+
+def segment_entries(ax, ay, dx, dy, columns):
+    left, top, right, bottom = columns
+    near_x, far_x = slab_many(ax, dx, left, right)
+    near_y, far_y = slab_many(ay, dy, top, bottom)
+    t0 = np.maximum(np.maximum(near_x, near_y), 0.0)
+    t1 = np.minimum(np.minimum(far_x, far_y), 1.0)
+    return np.where(t0 <= t1, t0, np.inf)
+
+
+def segment_entry_many(ax, ay, dx, dy, columns):
+    entries = segment_entries(ax, ay, dx, dy, columns)
+    if entries.shape[1] == 0:
+        return np.full(len(ax), np.inf)
+    return entries.min(axis=1)
+
+
+def path_touches(ax, ay, bx, by, left, top, right, bottom):
+    if top <= ay <= bottom and min(ax, bx) <= right and max(ax, bx) >= left:
+        return True
+    return left <= bx <= right and min(ay, by) <= bottom and max(ay, by) >= top
+
+
+def path_hits(ax, ay, bx, by, columns):
+    left, top, right, bottom = columns
+    ax = ax[:, None]
+    ay = ay[:, None]
+    bx = bx[:, None]
+    by = by[:, None]
+    along_x = (top <= ay) & (ay <= bottom) & (np.minimum(ax, bx) <= right) & (np.maximum(ax, bx) >= left)
+    along_y = (left <= bx) & (bx <= right) & (np.minimum(ay, by) <= bottom) & (np.maximum(ay, by) >= top)
+    return along_x | along_y
+
+
+def collidepoint_many(rects, x, y=None):
+    if not isinstance(rects, RectBatch):
+        rects = RectBatch(rects)
+    return rects.collidepoint(x, y)
+
+
+def colliderect_many(rect, rects):
+    if not isinstance(rects, RectBatch):
+        rects = RectBatch(rects)
+    return rects.colliderect(rect)
+
+
+CONTACT_SKIN = 1e-3
+
+
+def sweep_edges(edges, lo, hi, band_lo, band_hi, step, axis, skin=CONTACT_SKIN):
+    near = axis
+    far = axis + 2
+    side_lo = 1 - axis
+    side_hi = 3 - axis
+    if step > 0:
+        for edge in edges:
+            if band_hi < edge[side_lo] or band_lo > edge[side_hi]:
+                continue
+            if edge[near] < hi:
+                if edge[far] > lo and band_hi > edge[side_lo] and band_lo < edge[side_hi] and lo + hi < edge[near] + edge[far]:
+                    return 0.0
+                continue
+            limit = edge[near] - hi - skin
+            if limit < step:
+                step = max(0.0, limit)
+    elif step < 0:
+        for edge in edges:
+            if band_hi < edge[side_lo] or band_lo > edge[side_hi]:
+                continue
+            if edge[far] > lo:
+                if edge[near] < hi and band_hi > edge[side_lo] and band_lo < edge[side_hi] and lo + hi > edge[near] + edge[far]:
+                    return 0.0
+                continue
+            limit = edge[far] - lo + skin
+            if limit > step:
+                step = min(0.0, limit)
+    return step
+
+
+def edges_overlap_many(columns, left, top, right, bottom):
+    e_left, e_top, e_right, e_bottom = columns
+    apart = (right[:, None] < e_left) | (left[:, None] > e_right) | (bottom[:, None] < e_top) | (top[:, None] > e_bottom)
+    return ~apart.all(axis=1)
+
+
+def sweep_edges_many(columns, lo, hi, band_lo, band_hi, step, axis, skin=CONTACT_SKIN):
+    near = columns[axis]
+    far = columns[axis + 2]
+    side_lo = columns[1 - axis]
+    side_hi = columns[3 - axis]
+    lo = lo[:, None]
+    hi = hi[:, None]
+    band_lo = band_lo[:, None]
+    band_hi = band_hi[:, None]
+    in_band = (band_hi >= side_lo) & (band_lo <= side_hi)
+    ahead = np.where(in_band & (near >= hi), near - hi, np.inf).min(axis=1, initial=np.inf) - skin
+    behind = np.where(in_band & (far <= lo), far - lo, -np.inf).max(axis=1, initial=-np.inf) + skin
+    forward = step > 0
+    moved = np.where(forward, np.maximum(0.0, np.minimum(step, ahead)), np.minimum(0.0, np.maximum(step, behind)))
+    overlap = (band_hi > side_lo) & (band_lo < side_hi) & (hi > near) & (lo < far)
+    if overlap.any():
+        centre = lo + hi
+        middle = near + far
+        stuck = np.where(forward, (overlap & (centre < middle)).any(axis=1), (overlap & (centre > middle)).any(axis=1))
+        moved = np.where(stuck & (step != 0), 0.0, moved)
+    return moved
@@ -0,0 +1,181 @@
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"FRR1"
+HEADER = struct.Struct("<4sQBH")
+MOVE_KEYS = ("up", "down", "left", "right", "w", "a", "s", "d")
+MOVE = 0
+MOUSE = 1
+KEY = 2
+END = 3
+SNAPSHOT = 4
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, idx):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[idx]
+        idx += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, idx
+        shift += 7
+
+
+def movement_mask(keyboard):
+    mask = 0
+    for bit, name in enumerate(MOVE_KEYS):
+        if getattr(keyboard, name):
+            mask |= 1 << bit
+    return mask
+
+
+class Recorder:
+    def __init__(self, seed, stage, tick_rate):
+        self.seed = seed
+        self.stage = stage
+        self.tick_rate = tick_rate
+        self.ticks = 0
+        self.last_tick = 0
+        self.mask = 0
+        self.body = bytearray()
+
+    def event(self, kind):
+        write_varint(self.body, self.ticks - self.last_tick)
+        self.body.append(kind)
+        self.last_tick = self.ticks
+
+    def movement(self, keyboard):
+        mask = movement_mask(keyboard)
+        if mask != self.mask:
+            self.event(MOVE)
+            self.body.append(mask)
+            self.mask = mask
+
+    def mouse_down(self, pos):
+        self.event(MOUSE)
+        self.body += struct.pack("<HH", int(max(0, min(pos[0], 0xFFFF))), int(max(0, min(pos[1], 0xFFFF))))
+
+    def key_down(self, key):
+        self.event(KEY)
+        write_varint(self.body, int(key))
+
+    def restored(self, data):
+        self.event(SNAPSHOT)
+        write_varint(self.body, len(data))
+        self.body += data
+
+    def advance(self):
+        self.ticks += 1
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, self.seed, self.stage, self.tick_rate))
+        out += self.body
+        write_varint(out, self.ticks - self.last_tick)
+        out.append(END)
+        return bytes(out)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run-{self.seed}-{self.ticks}.frr")
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+
+class Recording:
+    def __init__(self, data):
+        magic, self.seed, self.stage, self.tick_rate = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a Forest Relic recording")
+        self.events = []
+        tick = 0
+        idx = HEADER.size
+        while True:
+            delta, idx = read_varint(data, idx)
+            tick += delta
+            kind = data[idx]
+            idx += 1
+            if kind == MOVE:
+                self.events.append((tick, kind, data[idx]))
+                idx += 1
+            elif kind == MOUSE:
+                self.events.append((tick, kind, struct.unpack_from("<HH", data, idx)))
+                idx += 4
+            elif kind == KEY:
+                key, idx = read_varint(data, idx)
+                self.events.append((tick, kind, key))
+            elif kind == SNAPSHOT:
+                size, idx = read_varint(data, idx)
+                self.events.append((tick, kind, bytes(data[idx : idx + size])))
+                idx += size
+            elif kind == END:
+                self.ticks = tick
+                return
+            else:
+                raise ValueError(f"unknown event {kind} at byte {idx - 1}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+
+def replay(recording, game=None, realtime=False):
+    from headless import HeadlessRunner
+
+    runner = HeadlessRunner(game)
+    game = runner.game
+    game.RECORD_DIR = None
+    game.TICK_RATE = recording.tick_rate
+    runner.dt = 1 / recording.tick_rate
+    game.start_game(recording.seed, recording.stage)
+    keyboard = game.keyboard
+    events = recording.events
+    idx = 0
+    start = time.perf_counter()
+    for tick in range(recording.ticks):
+        while idx < len(events) and events[idx][0] == tick:
+            _, kind, payload = events[idx]
+            idx += 1
+            if kind == MOVE:
+                keyboard.release_all()
+                keyboard.press(*(name for bit, name in enumerate(MOVE_KEYS) if payload & (1 << bit)))
+            elif kind == MOUSE:
+                game.on_mouse_down(payload)
+            elif kind == KEY:
+                game.on_key_down(payload)
+            elif kind == SNAPSHOT:
+                game.restore_snapshot(payload)
+        if game.game_state != "playing":
+            break
+        runner.step()
+        if realtime:
+            delay = start + (tick + 1) * runner.dt - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return runner
+
+
+def main(argv):
+    recording = Recording.load(argv[0])
+    start = time.perf_counter()
+    runner = replay(recording, realtime="--realtime" in argv)
+    elapsed = time.perf_counter() - start
+    game = runner.game
+    print(f"replayed {runner.ticks} of {recording.ticks} ticks in {elapsed:.2f}s")
+    print(f"seed={recording.seed} state={game.game_state} stage={game.stage} hp={game.player.hp}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
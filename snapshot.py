@@ -0,0 +1,339 @@
+import os
+import random
+import struct
+from collections import deque
+
+MAGIC = b"FRS1"
+HEADER = struct.Struct("<4sQHBB?ddH")
+RNG = struct.Struct("<625I?d")
+FLAG = struct.Struct("<?")
+COUNT = struct.Struct("<H")
+PLAYER = struct.Struct("<ddddii?dBBdBd")
+ENEMY = struct.Struct("<BddddddddBBdBd")
+POINT = struct.Struct("<dd")
+TURRET = struct.Struct("<ddddd")
+SPIKE = struct.Struct("<dddddd?")
+STATES = ("menu", "playing", "game_over", "win")
+ANIMS = ("idle", "walk")
+KINDS = ("Slime", "Phantom", "Charger")
+EXTRAS = {
+    "Slime": (struct.Struct("<b"), ("direction",)),
+    "Phantom": (struct.Struct("<d"), ("angle",)),
+    "Charger": (struct.Struct("<ddd?d"), ("dash_cooldown", "dash_timer", "dash_speed", "dashing", "dash_time")),
+}
+COLUMNS = ("x", "y", "dx", "dy", "speed", "ttl", "radius", "damage")
+
+
+def whole(value):
+    return int(value) if value == int(value) else value
+
+
+def pack_rng(out, rng):
+    version, internal, gauss = rng.getstate()
+    out += RNG.pack(*internal, gauss is not None, gauss or 0.0)
+
+
+def unpack_rng(data, idx):
+    values = RNG.unpack_from(data, idx)
+    rng = random.Random()
+    rng.setstate((3, values[:625], values[626] if values[625] else None))
+    return rng, idx + RNG.size
+
+
+def pack_anims(character):
+    values = []
+    for name in ANIMS:
+        values += character.animation_state(name)
+    return values
+
+
+def unpack_anims(character, state, values):
+    character.state = ANIMS[state]
+    for name, (index, timer) in zip(ANIMS, zip(values[::2], values[1::2])):
+        character.restore_animation(name, index, timer)
+
+
+def pack_projectiles(out, shots):
+    n = shots.count
+    out += COUNT.pack(n)
+    if n:
+        column = struct.Struct(f"<{n}d")
+        for name in COLUMNS:
+            out += column.pack(*getattr(shots, name)[:n].tolist())
+
+
+def unpack_projectiles(data, idx):
+    (n,) = COUNT.unpack_from(data, idx)
+    idx += COUNT.size
+    columns = []
+    if n:
+        column = struct.Struct(f"<{n}d")
+        for name in COLUMNS:
+            values = column.unpack_from(data, idx)
+            if name in ("radius", "damage"):
+                values = [whole(v) for v in values]
+            columns.append(values)
+            idx += column.size
+    return (n, columns), idx
+
+
+def fill_projectiles(shots, parsed):
+    n, columns = parsed
+    shots.clear()
+    if n:
+        shots.grow(n)
+        for name, values in zip(COLUMNS, columns):
+            getattr(shots, name)[:n] = values
+        shots.count = n
+
+
+def pick(names, index, what):
+    if index >= len(names):
+        raise ValueError(f"unknown {what} {index} in snapshot")
+    return names[index]
+
+
+def capture(game):
+    out = bytearray(
+        HEADER.pack(
+            MAGIC,
+            game.game_seed,
+            game.TICK_RATE,
+            game.stage,
+            STATES.index(game.game_state),
+            game.exit_unlocked,
+            game.game_time,
+            game.tick_accumulator,
+            game.total_gems,
+        )
+    )
+    pack_rng(out, game.rng)
+    enemies = game.enemies
+    out += FLAG.pack(bool(enemies))
+    if enemies:
+        pack_rng(out, enemies[0].rng)
+
+    player = game.player
+    actor = player.actor
+    out += PLAYER.pack(
+        actor.x,
+        actor.y,
+        player.hp,
+        player.invulnerable,
+        player.ammo,
+        player.reserve,
+        player.reloading,
+        player.reload_timer,
+        ANIMS.index(player.state),
+        *pack_anims(player),
+    )
+
+    out += COUNT.pack(len(enemies))
+    for enemy in enemies:
+        kind = type(enemy).__name__
+        area = enemy.area
+        out += ENEMY.pack(
+            KINDS.index(kind),
+            enemy.x,
+            enemy.y,
+            area.x,
+            area.y,
+            area.width,
+            area.height,
+            enemy.hp,
+            enemy.pause_timer,
+            ANIMS.index(enemy.state),
+            *pack_anims(enemy),
+        )
+        extra, fields = EXTRAS[kind]
+        out += extra.pack(*(getattr(enemy, name) for name in fields))
+
+    for items in (game.gems, game.hearts):
+        out += COUNT.pack(len(items))
+        for item in items:
+            out += POINT.pack(item.x, item.y)
+    out += COUNT.pack(len(game.turrets))
+    for turret in game.turrets:
+        out += TURRET.pack(turret["actor"].x, turret["actor"].y, turret["cooldown"], turret["timer"], turret["range"])
+    out += COUNT.pack(len(game.spikes))
+    for spike in game.spikes:
+        r = spike["rect"]
+        out += SPIKE.pack(r.x, r.y, r.width, r.height, spike["timer"], spike["period"], spike["active"])
+    pack_projectiles(out, game.bullets)
+    pack_projectiles(out, game.turret_shots)
+    return bytes(out)
+
+
+def parse(data, tick_rate):
+    try:
+        return parse_fields(data, tick_rate)
+    except struct.error as exc:
+        raise ValueError(f"truncated snapshot: {exc}") from None
+
+
+def parse_fields(data, tick_rate):
+    magic, seed, rate, stage, state, exit_unlocked, game_time, accumulator, total_gems = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Forest Relic snapshot")
+    if rate != tick_rate:
+        raise ValueError(f"snapshot was taken at {rate} ticks/s, the game runs at {tick_rate}")
+    parsed = {
+        "seed": seed,
+        "stage": stage,
+        "state": pick(STATES, state, "game state"),
+        "exit_unlocked": exit_unlocked,
+        "game_time": game_time,
+        "accumulator": accumulator,
+        "total_gems": total_gems,
+    }
+    idx = HEADER.size
+    parsed["rng"], idx = unpack_rng(data, idx)
+    (has_stage_rng,) = FLAG.unpack_from(data, idx)
+    idx += FLAG.size
+    parsed["stage_rng"] = None
+    if has_stage_rng:
+        parsed["stage_rng"], idx = unpack_rng(data, idx)
+
+    values = PLAYER.unpack_from(data, idx)
+    idx += PLAYER.size
+    pick(ANIMS, values[8], "animation")
+    parsed["player"] = values
+
+    (n,) = COUNT.unpack_from(data, idx)
+    idx += COUNT.size
+    enemies = []
+    for _ in range(n):
+        values = ENEMY.unpack_from(data, idx)
+        idx += ENEMY.size
+        name = pick(KINDS, values[0], "enemy kind")
+        pick(ANIMS, values[9], "animation")
+        extra, fields = EXTRAS[name]
+        enemies.append((name, values, list(zip(fields, extra.unpack_from(data, idx)))))
+        idx += extra.size
+    parsed["enemies"] = enemies
+
+    for name in ("gems", "hearts"):
+        (n,) = COUNT.unpack_from(data, idx)
+        idx += COUNT.size
+        items = []
+        for _ in range(n):
+            items.append(POINT.unpack_from(data, idx))
+            idx += POINT.size
+        parsed[name] = items
+    for name, record in (("turrets", TURRET), ("spikes", SPIKE)):
+        (n,) = COUNT.unpack_from(data, idx)
+        idx += COUNT.size
+        items = []
+        for _ in range(n):
+            items.append(record.unpack_from(data, idx))
+            idx += record.size
+        parsed[name] = items
+    parsed["bullets"], idx = unpack_projectiles(data, idx)
+    parsed["turret_shots"], idx = unpack_projectiles(data, idx)
+    if idx != len(data):
+        raise ValueError(f"snapshot has {len(data) - idx} trailing bytes")
+    return parsed
+
+
+def restore(game, data):
+    parsed = parse(data, game.TICK_RATE)
+    seed = parsed["seed"]
+    stage = parsed["stage"]
+    game.rng.setstate(parsed["rng"].getstate())
+    stage_rng = parsed["stage_rng"]
+
+    game.game_seed = seed
+    game.stage = stage
+    if not game.walls or game.player is None:
+        game.player = game.create_game_objects(game.plan_stage(seed, stage))
+    game.recycle_stage()
+    game.game_state = parsed["state"]
+    game.exit_unlocked = parsed["exit_unlocked"]
+    game.game_time = parsed["game_time"]
+    game.tick_accumulator = parsed["accumulator"]
+    game.total_gems = parsed["total_gems"]
+
+    values = parsed["player"]
+    player = game.player
+    player.actor.x, player.actor.y = values[0], values[1]
+    player.hp = whole(values[2])
+    player.invulnerable = values[3]
+    player.ammo, player.reserve, player.reloading, player.reload_timer = values[4:8]
+    unpack_anims(player, values[8], values[9:])
+
+    scratch = random.Random(0)
+    enemies = []
+    for name, values, extras in parsed["enemies"]:
+        kind = getattr(game, name)
+        area = game.Rect((values[3], values[4]), (values[5], values[6]))
+        enemy = game.enemy_pools[kind].acquire((values[1], values[2]), area, scratch)
+        enemy.rng = stage_rng
+        enemy.hp = whole(values[7])
+        enemy.pause_timer = values[8]
+        unpack_anims(enemy, values[9], values[10:])
+        for field, value in extras:
+            setattr(enemy, field, value)
+        enemies.append(enemy)
+    game.enemies[:] = enemies
+
+    game.gems = [game.gem_pool.acquire(pos) for pos in parsed["gems"]]
+    game.hearts = [game.heart_pool.acquire(pos) for pos in parsed["hearts"]]
+    turrets = []
+    for x, y, cooldown, timer, reach in parsed["turrets"]:
+        turret = game.turret_pool.acquire((x, y), timer)
+        turret["cooldown"] = cooldown
+        turret["range"] = whole(reach)
+        turrets.append(turret)
+    game.turrets = turrets
+    game.spikes = [
+        {"rect": game.Rect((x, y), (w, h)), "timer": timer, "period": period, "active": active}
+        for x, y, w, h, timer, period, active in parsed["spikes"]
+    ]
+    fill_projectiles(game.bullets, parsed["bullets"])
+    fill_projectiles(game.turret_shots, parsed["turret_shots"])
+    game.index_pickups()
+
+
+def save(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class SnapshotRing:
+    def __init__(self, size, every):
+        self.every = every
+        self.snapshots = deque(maxlen=size)
+        self.stage_starts = {}
+        self.ticks = 0
+
+    def clear(self):
+        self.snapshots.clear()
+        self.stage_starts.clear()
+        self.ticks = 0
+
+    def due(self):
+        self.ticks += 1
+        return self.every > 0 and self.ticks % self.every == 0
+
+    def push(self, data):
+        self.snapshots.append(data)
+
+    def mark_stage(self, stage, data):
+        self.stage_starts[stage] = data
+
+    def rewind(self):
+        if len(self.snapshots) > 1:
+            self.snapshots.pop()
+        return self.snapshots[-1] if self.snapshots else None
+
+    def __len__(self):
+        return len(self.snapshots)
@@ -0,0 +1,58 @@
+class SpatialHash:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, r):
+        size = self.cell_size
+        return (
+            int(r.left // size),
+            int(r.top // size),
+            int(r.right // size),
+            int(r.bottom // size),
+        )
+
+    def insert(self, item, r):
+        x0, y0, x1, y1 = self.cell_range(r)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), []).append(item)
+
+    def remove(self, item, r):
+        x0, y0, x1, y1 = self.cell_range(r)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for i, other in enumerate(bucket):
+                    if other is item:
+                        del bucket[i]
+                        break
+                if not bucket:
+                    del self.cells[(cx, cy)]
+
+    def query_point(self, x, y):
+        size = self.cell_size
+        return self.cells.get((int(x // size), int(y // size)), [])
+
+    def query_rect(self, r):
+        return self.query_box(r.left, r.top, r.right, r.bottom)
+
+    def query_box(self, left, top, right, bottom):
+        size = self.cell_size
+        x0, y0, x1, y1 = int(left // size), int(top // size), int(right // size), int(bottom // size)
+        if x0 == x1 and y0 == y1:
+            return list(self.cells.get((x0, y0), ()))
+        found = []
+        seen = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for item in self.cells.get((cx, cy), ()):
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        found.append(item)
+        return found
@@ -0,0 +1,87 @@
+import os
+import struct
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+PAGE_WIDTH = 512
+PADDING = 1
+
+
+def png_size(path):
+    with open(path, "rb") as f:
+        header = f.read(24)
+    return struct.unpack(">II", header[16:24])
+
+
+def scaled_size(size, scale):
+    return (int(size[0] * scale), int(size[1] * scale))
+
+
+def pack(sizes, width, padding=PADDING):
+    positions = []
+    x = y = shelf = 0
+    for w, h in sizes:
+        if x and x + w > width:
+            x = 0
+            y += shelf + padding
+            shelf = 0
+        positions.append((x, y))
+        x += w + padding
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+
+class SpriteAtlas:
+    def __init__(self, directory=IMAGE_DIR):
+        self.directory = directory
+        self.names = sorted(f[:-4] for f in os.listdir(directory) if f.endswith(".png"))
+        self.base_sizes = {name: png_size(self.path(name)) for name in self.names}
+        self.pages = {}
+        self.frames = {}
+        self.sizes = {}
+
+    def path(self, name):
+        return os.path.join(self.directory, name + ".png")
+
+    def build(self, scale):
+        if scale in self.pages:
+            return
+        sizes = [scaled_size(self.base_sizes[name], scale) for name in self.names]
+        for name, size in zip(self.names, sizes):
+            self.sizes[(name, scale)] = size
+        if pygame is None:
+            for name in self.names:
+                self.frames[(name, scale)] = name
+            self.pages[scale] = None
+            return
+        width = max(PAGE_WIDTH, max(w for w, _ in sizes))
+        positions, height = pack(sizes, width)
+        page = pygame.Surface((width, height), pygame.SRCALPHA)
+        for name, size, pos in zip(self.names, sizes, positions):
+            image = pygame.image.load(self.path(name))
+            if size != self.base_sizes[name]:
+                image = pygame.transform.scale(image, size)
+            page.blit(image, pos)
+        if pygame.display.get_surface() is not None:
+            page = page.convert_alpha()
+        for name, size, pos in zip(self.names, sizes, positions):
+            self.frames[(name, scale)] = page.subsurface((pos, size))
+        self.pages[scale] = page
+
+    def frame(self, name, scale=1.0):
+        key = (name, scale)
+        found = self.frames.get(key)
+        if found is None:
+            self.build(scale)
+            found = self.frames[key]
+        return found
+
+    def size(self, name, scale=1.0):
+        key = (name, scale)
+        if key not in self.sizes:
+            self.build(scale)
+        return self.sizes[key]
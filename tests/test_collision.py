@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+
+from rect_stub import Rect, RectBatch, sweep_edges, sweep_edges_many
+
+WALL = RectBatch([Rect((100, 0), (18, 200))]).edges
+
+
+def sweep_x(left, width, step):
+    return sweep_edges(WALL, left, left + width, 50, 80, step, 0)
+
+
+def test_sweep_stops_at_wall():
+    step = sweep_x(40, 32, 100)
+    assert 72 + step < 100
+    assert step > 27
+
+
+def test_overlapping_body_cannot_go_deeper():
+    # body straddles the wall's left face
+    assert sweep_x(80, 32, 5) == 0.0
+    # body straddles the wall's right face
+    assert sweep_x(105, 32, -5) == 0.0
+
+
+def test_overlapping_body_can_separate():
+    assert sweep_x(80, 32, -5) == -5
+    assert sweep_x(105, 32, 5) == 5
+
+
+def test_overlapping_body_never_crosses_wall():
+    left = 80.0
+    for _ in range(200):
+        left += sweep_x(left, 32, 3)
+    assert left + 16 < 109
+
+
+def test_batched_sweep_matches_single_sweep():
+    rng = random.Random(3)
+    for _ in range(200):
+        walls = RectBatch([Rect((rng.randint(0, 20) * 10, rng.randint(0, 20) * 10), (rng.choice((10, 18, 40)), 18)) for _ in range(6)])
+        lo = np.array([rng.randint(0, 40) * 5.0 for _ in range(20)])
+        band = np.array([rng.randint(0, 40) * 5.0 for _ in range(20)])
+        step = np.array([rng.choice((0.0, 4.0, -4.0, rng.uniform(-30, 30))) for _ in range(20)])
+        for axis in (0, 1):
+            got = sweep_edges_many(walls.columns, lo, lo + 32, band, band + 24, step, axis)
+            want = [sweep_edges(walls.edges, a, a + 32, b, b + 24, s, axis) for a, b, s in zip(lo, band, step)]
+            assert got.tolist() == want
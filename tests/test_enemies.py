@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from headless import HeadlessRunner
+
+
+def run(monkeypatch, one_by_one, shared_rng):
+    runner = HeadlessRunner()
+    runner.start(3)
+    g = runner.game
+    g.player.hp = 10 ** 6
+    px, py = g.player.actor.pos
+    cells = [c for c in g.reachable_positions((px, py), g.walls) if abs(c[0] - px) + abs(c[1] - py) > g.DETECT_RANGE]
+    picks = random.Random(5)
+    for i in range(30):
+        pos = picks.choice(cells)
+        rng = g.rng if shared_rng else g.stage_rng(g.game_seed, g.stage)
+        enemy = g.enemy_pools[(g.Slime, g.Phantom, g.Charger)[i % 3]].acquire(pos, g.bounded_rect(pos, 200, 160), rng)
+        enemy.hp = 1 if i % 4 == 0 else 10 ** 9
+        g.enemies.append(enemy)
+    if one_by_one:
+
+        def update_enemies(dt, settle=None):
+            mask = g.wall_mask_for(g.walls)
+            box = g.actor_box(g.player.actor)
+            for enemy in list(g.enemies):
+                g.update_enemy_batch([enemy], dt, g.player.prev_pos, g.player.actor.pos, box, mask, settle)
+
+        monkeypatch.setattr(g, "update_enemies", update_enemies)
+    seen = []
+    for tick in range(300):
+        if tick % 7 == 0 and g.enemies:
+            g.enemies[tick % len(g.enemies)].hp = 0
+        runner.step()
+        seen.append(([(e.pos, e.state, e.frame) for e in g.enemies], [h.pos for h in g.hearts], g.rng.random()))
+    return seen
+
+
+@pytest.mark.parametrize("shared_rng", [False, True])
+def test_batched_update_matches_updating_each_enemy(monkeypatch, shared_rng):
+    assert run(monkeypatch, False, shared_rng) == run(monkeypatch, True, shared_rng)
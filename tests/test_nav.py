@@ -0,0 +1,41 @@
+import pytest
+
+from headless import HeadlessRunner
+
+
+@pytest.fixture(scope="module")
+def game():
+    runner = HeadlessRunner()
+    runner.start(0)
+    return runner
+
+
+@pytest.mark.parametrize(
+    "enemy_pos, player_pos",
+    [
+        ((300, 190), (300, 80)),  # under the wall at (220, 110, 180, 18)
+        ((130, 120), (130, 20)),  # under the wall at (40, 40, 180, 18)
+        ((130, 120), (20, 120)),  # right of the wall at (40, 40, 18, 160)
+    ],
+)
+def test_chaser_reaches_player_around_wall(game, enemy_pos, player_pos):
+    runner = game
+    g = runner.game
+    g.start_game(0)
+    g.recycle_stage()
+    g.gems = []
+    g.hearts = []
+    g.turrets = []
+    g.spikes = []
+    g.index_pickups()
+    g.player.hp = 10 ** 6
+    g.player.actor.pos = player_pos
+    chaser = g.enemy_pools[g.Slime].acquire(enemy_pos, g.Rect((0, 0), (g.WIDTH, g.HEIGHT)), g.rng)
+    chaser.hp = 10 ** 6
+    g.enemies[:] = [chaser]
+    for _ in range(900):
+        runner.step()
+        x, y = chaser.actor.pos
+        if abs(x - player_pos[0]) < 24 and abs(y - player_pos[1]) < 24:
+            return
+    pytest.fail(f"chaser stuck at {chaser.actor.pos}")
@@ -0,0 +1,46 @@
+import pytest
+
+from headless import HeadlessRunner
+
+
+@pytest.fixture
+def runner():
+    runner = HeadlessRunner()
+    yield runner
+    runner.game.keyboard.release_all()
+
+
+def empty_stage(g):
+    g.start_game(0)
+    g.recycle_stage()
+    g.enemies[:] = []
+    g.gems = []
+    g.hearts = []
+    g.turrets = []
+    g.spikes = []
+    g.player.actor.pos = (500, 290)
+    g.keyboard.press("right")
+
+
+def test_slow_tick_collects_gem_the_player_runs_past(runner):
+    # at 4 ticks a second the player moves 35px, from 17px left of the gem to 18px right of it
+    g = runner.game
+    empty_stage(g)
+    g.gems = [g.gem_pool.acquire((517, 290))]
+    g.index_pickups()
+    g.tick(1 / 4)
+    assert g.player.actor.x == pytest.approx(535)
+    assert g.gems == []
+
+
+def test_slow_tick_hurts_player_running_through_enemy(runner):
+    g = runner.game
+    empty_stage(g)
+    g.index_pickups()
+    slime = g.enemy_pools[g.Slime].acquire((517, 290), g.Rect((460, 250), (140, 80)), g.rng)
+    slime.pause_timer = 10.0
+    g.enemies[:] = [slime]
+    hp = g.player.hp
+    g.tick(1 / 4)
+    assert g.player.actor.x == pytest.approx(535)
+    assert g.player.hp == hp - g.ENEMY_TOUCH_DAMAGE
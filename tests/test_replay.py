@@ -0,0 +1,82 @@
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOVE_KEYS = ("up", "down", "left", "right", "w", "a", "s", "d")
+
+
+def load_real_game():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pytest.importorskip("pygame")
+    runner = pytest.importorskip("pgzero.runner")
+    from pgzero.game import PGZeroGame
+
+    path = os.path.join(ROOT, "main.py")
+    game = types.ModuleType("main_real")
+    game.__file__ = path
+    sys.modules["main_real"] = game
+    runner.prepare_mod(game)
+    game.__name__ = "main_real"
+    with open(path) as f:
+        exec(compile(f.read(), path, "exec"), game.__dict__)
+    PGZeroGame(game).reinit_screen()
+    return game
+
+
+def test_real_run_replays_identically_headless():
+    from replay import Recorder, Recording, replay
+
+    real = load_real_game()
+    real.start_game(11)
+    real.recorder = Recorder(real.game_seed, real.stage, real.TICK_RATE)
+    for i in range(700):
+        held = ("right", "down", "left", "up", "right")[(i // 60) % 5]
+        real.keyboard = types.SimpleNamespace(**{name: name == held for name in MOVE_KEYS})
+        if i % 25 == 0:
+            real.on_mouse_down((320 + i % 90, 200))
+        real.update(1 / real.TICK_RATE)
+        if real.game_state != "playing":
+            break
+    recording = Recording(real.recorder.to_bytes())
+
+    runner = replay(recording)
+    game = runner.game
+    assert runner.ticks == recording.ticks
+    assert game.player.actor.pos == real.player.actor.pos
+    assert game.player.hp == real.player.hp
+    assert [(e.actor.pos, e.hp) for e in game.enemies] == [(e.actor.pos, e.hp) for e in real.enemies]
+    assert [g.pos for g in game.gems] == [g.pos for g in real.gems]
+
+
+def test_snapshot_restores_replay_identically(tmp_path):
+    from headless import HeadlessRunner
+    from replay import Recorder, Recording, replay
+
+    runner = HeadlessRunner()
+    game = runner.game
+    game.SAVE_PATH = str(tmp_path / "quick.frs")
+    runner.start(6)
+    game.recorder = Recorder(game.game_seed, game.stage, game.TICK_RATE)
+    keys = game.keys
+    presses = {150: keys.F5, 260: keys.BACKSPACE, 380: keys.F6, 450: keys.F9}
+    for i in range(600):
+        held = ("right", "up", "left", "down")[(i // 50) % 4]
+        game.keyboard.release_all()
+        game.keyboard.press(held)
+        if i % 30 == 0:
+            game.on_mouse_down((200 + i % 200, 240))
+        if i in presses:
+            game.on_key_down(presses[i])
+        runner.step()
+        if game.game_state != "playing":
+            break
+    assert game.recorder is not None
+    recording = Recording(game.recorder.to_bytes())
+    final = game.take_snapshot()
+
+    replay(recording, game)
+    assert game.take_snapshot() == final
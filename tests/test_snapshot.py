@@ -0,0 +1,63 @@
+import pytest
+
+import snapshot
+from headless import HeadlessRunner
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = HeadlessRunner()
+    runner.start(4)
+    return runner
+
+
+def test_bad_snapshot_leaves_game_untouched(runner):
+    g = runner.game
+    runner.start(4)
+    for _ in range(120):
+        runner.step()
+    data = g.take_snapshot()
+    for bad in (data[:-3], data[: len(data) // 2], data + b"\0", b"XXXX" + data[4:]):
+        with pytest.raises(ValueError):
+            snapshot.restore(g, bad)
+        assert g.take_snapshot() == data
+
+
+def test_quickload_from_menu_marks_stage(runner, tmp_path):
+    g = runner.game
+    runner.start(4)
+    for _ in range(60):
+        runner.step()
+    g.SAVE_PATH = str(tmp_path / "quick.frs")
+    g.on_key_down(g.keys.F5)
+    saved = g.take_snapshot()
+    g.reset_to_menu()
+    g.on_key_down(g.keys.F9)
+    assert g.game_state == "playing"
+    assert g.take_snapshot() == saved
+    for _ in range(60):
+        runner.step()
+    g.on_key_down(g.keys.F6)
+    assert g.take_snapshot() == saved
+
+
+def test_unreadable_quicksave_is_reported(runner, tmp_path, capsys):
+    g = runner.game
+    runner.start(4)
+    path = tmp_path / "quick.frs"
+    path.write_bytes(b"FRS1")
+    g.SAVE_PATH = str(path)
+    before = g.take_snapshot()
+    g.on_key_down(g.keys.F9)
+    assert "snapshot failed" in capsys.readouterr().out
+    assert g.take_snapshot() == before
+
+
+def test_stage_start_does_not_depend_on_pool_history(runner):
+    g = runner.game
+    runner.start(4)
+    fresh = g.take_snapshot()
+    for _ in range(300):
+        runner.step()
+    runner.start(4)
+    assert g.take_snapshot() == fresh
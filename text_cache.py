@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+try:
+    import pygame
+    from pgzero import ptext
+except ImportError:
+    pygame = None
+    ptext = None
+
+ANCHORS = {
+    "topleft": (0, 0),
+    "midtop": (0.5, 0),
+    "topright": (1, 0),
+    "midleft": (0, 0.5),
+    "center": (0.5, 0.5),
+    "midright": (1, 0.5),
+    "bottomleft": (0, 1),
+    "midbottom": (0.5, 1),
+    "bottomright": (1, 1),
+}
+
+
+def surface_bytes(surf):
+    return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+class TextCache:
+    def __init__(self, budget=1 << 20):
+        self.budget = budget
+        self.surfaces = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def ready(self):
+        return ptext is not None and pygame.display.get_surface() is not None
+
+    def get(self, text, fontsize, color):
+        key = (text, fontsize, color)
+        surfaces = self.surfaces
+        surf = surfaces.get(key)
+        if surf is not None:
+            surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = ptext.getsurf(text, fontsize=fontsize, color=color, cache=False)
+        surfaces[key] = surf
+        self.used += surface_bytes(surf)
+        while self.used > self.budget and len(surfaces) > 1:
+            _, old = surfaces.popitem(last=False)
+            self.used -= surface_bytes(old)
+            self.evictions += 1
+        return surf
+
+    def place(self, surf, anchor, pos):
+        hx, vy = ANCHORS[anchor]
+        return (int(round(pos[0] - hx * surf.get_width())), int(round(pos[1] - vy * surf.get_height())))
+
+    def clear(self):
+        self.surfaces.clear()
+        self.used = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.surfaces),
+            "bytes": self.used,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
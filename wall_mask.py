@@ -0,0 +1,105 @@
+import math
+from rect_stub import RectBatch, segment_entry
+from spatial_hash import SpatialHash
+
+EMPTY = 0
+SOLID = 1
+EDGE = 2
+TILE = 8
+FAR = 255
+
+
+class WallMask:
+    def __init__(self, walls, width, height, cell_size=16):
+        self.walls = walls
+        self.rects = RectBatch(walls)
+        self.index = SpatialHash(cell_size)
+        for r, edge in zip(self.rects.rects, self.rects.edges):
+            self.index.insert(edge, r)
+        self.width = width
+        self.height = height
+        self.bits = bytearray(width * height)
+        for w in walls:
+            self.fill(math.floor(w.left), math.floor(w.top), math.floor(w.right), math.floor(w.bottom), EDGE)
+        for w in walls:
+            self.fill(math.ceil(w.left), math.ceil(w.top), math.floor(w.right) - 1, math.floor(w.bottom) - 1, SOLID)
+        self.build_clearance()
+
+    def build_clearance(self):
+        cols = self.tile_cols = -(-self.width // TILE)
+        rows = -(-self.height // TILE)
+        full = (1 << cols) - 1
+        covered = [0] * rows
+        for left, top, right, bottom in self.rects.edges:
+            x0 = max(0, int(left // TILE))
+            x1 = min(cols - 1, int(right // TILE))
+            if x1 < x0:
+                continue
+            bits = ((1 << (x1 - x0 + 1)) - 1) << x0
+            for ty in range(max(0, int(top // TILE)), min(rows - 1, int(bottom // TILE)) + 1):
+                covered[ty] |= bits
+        self.clearance = bytearray([FAR]) * (cols * rows)
+        seen = [0] * rows
+        level = 0
+        while level < FAR and seen != covered:
+            for ty in range(rows):
+                fresh = covered[ty] & ~seen[ty]
+                base = ty * cols
+                while fresh:
+                    low = fresh & -fresh
+                    self.clearance[base + low.bit_length() - 1] = level
+                    fresh ^= low
+            seen = covered
+            wide = [(row | row << 1 | row >> 1) & full for row in covered]
+            covered = [
+                wide[ty] | (wide[ty - 1] if ty else 0) | (wide[ty + 1] if ty + 1 < rows else 0) for ty in range(rows)
+            ]
+            level += 1
+
+    def fill(self, x0, y0, x1, y1, value):
+        x0 = max(0, x0)
+        y0 = max(0, y0)
+        x1 = min(self.width - 1, x1)
+        y1 = min(self.height - 1, y1)
+        if x1 < x0 or y1 < y0:
+            return
+        run = bytes([value]) * (x1 - x0 + 1)
+        for y in range(y0, y1 + 1):
+            row = y * self.width
+            self.bits[row + x0:row + x1 + 1] = run
+
+    def blocked(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            cell = self.bits[int(y) * self.width + int(x)]
+            if cell != EDGE:
+                return cell == SOLID
+        return any(w.collidepoint(x, y) for w in self.walls)
+
+    def sweep(self, ax, ay, bx, by):
+        if 0 <= ax < self.width and 0 <= ay < self.height:
+            reach = max(abs(bx - ax), abs(by - ay))
+            if self.clearance[int(ay // TILE) * self.tile_cols + int(ax // TILE)] > reach // TILE + 1:
+                return None
+        size = self.index.cell_size
+        cells = self.index.cells
+        x0 = int(ax // size)
+        x1 = int(bx // size)
+        if x0 > x1:
+            x0, x1 = x1, x0
+        y0 = int(ay // size)
+        y1 = int(by // size)
+        if y0 > y1:
+            y0, y1 = y1, y0
+        dx = bx - ax
+        dy = by - ay
+        best = None
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for left, top, right, bottom in bucket:
+                    t = segment_entry(ax, ay, dx, dy, left, top, right, bottom)
+                    if t is not None and (best is None or t < best):
+                        best = t
+        return best